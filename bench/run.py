@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+'''
+Benchmarks the debugger against scripted emacs workloads
+
+every scenario runs in its own `gdb --batch` session over `emacs -Q --batch`,
+so nothing needs a display or the network. startup is timed from outside:
+how long gdb takes to get to its prompt with emacs loaded, bare, through
+setup.gdb and through the auto-load script. results are written as one JSON
+file per run so they can be compared across commits:
+
+    bench/run.py --emacs ~/src/emacs/src/emacs -o before.json
+    bench/run.py --emacs ~/src/emacs/src/emacs -o after.json
+    bench/run.py --compare before.json after.json
+'''
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BENCH_PREFIX = "BENCH-RESULT "
+
+# (scenario, lisp entry point, extra environment)
+RUNS = [
+    ("break-overhead", "bench-loop", {"BENCH_VARIANT": "baseline"}),
+    ("break-overhead", "bench-loop", {"BENCH_VARIANT": "break"}),
+    ("step-latency", "bench-step", {}),
+    ("backtrace-depth", "bench-backtrace", {}),
+    ("printer-size", "bench-printer", {}),
+]
+
+
+# how gdb gets the debugger loaded, for the startup scenario
+STARTUP_VARIANTS = ["bare", "setup.gdb", "auto-load"]
+
+
+def output_of(command):
+    try:
+        return subprocess.run(command, capture_output=True, text=True, cwd=REPO_DIR).stdout.strip()
+    except OSError:
+        return None
+
+
+def run_scenario(args, scenario, entry, extra):
+    env = dict(os.environ, BENCH_SCENARIO=scenario, **extra)
+    env.update({ "BENCH_LOOP": str(args.loop), "BENCH_STEPS": str(args.steps),
+                 "BENCH_REPEATS": str(args.repeats) })
+
+    command = [args.gdb, "-q", "-nx", "-batch",
+               "-ex", "source setup.gdb",
+               "-x", os.path.join(BENCH_DIR, "scenarios.py"),
+               "--args", args.emacs, "-Q", "--batch",
+               "-l", os.path.join(BENCH_DIR, "workloads.el"), "-f", entry]
+
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=REPO_DIR, env=env, stdin=subprocess.DEVNULL,
+                          capture_output=True, text=True, timeout=args.timeout)
+    wall = time.perf_counter() - start
+
+    results = [json.loads(line[len(BENCH_PREFIX):])
+               for line in proc.stdout.splitlines() if line.startswith(BENCH_PREFIX)]
+
+    if not results:
+        print(f"{scenario}: no results (gdb exited with {proc.returncode})", file=sys.stderr)
+        print(proc.stdout[-2000:], proc.stderr[-2000:], sep="\n", file=sys.stderr)
+
+    for result in results:
+        result["session_seconds"] = wall
+
+    return results
+
+
+def startup_command(args, variant, scripts_dir):
+    command = [args.gdb, "-q", "-nx", "-batch"]
+
+    if variant == "setup.gdb":
+        command += ["-ex", "source setup.gdb"]
+    elif variant == "auto-load":
+        command += ["-iex", f"set auto-load scripts-directory {scripts_dir}",
+                    "-iex", f"add-auto-load-safe-path {scripts_dir}"]
+
+    # a lisp command has to have been registered for it to count as ready
+    if variant != "bare":
+        command += ["-ex", "lisp-stats reset"]
+
+    return command + [args.emacs]
+
+
+def run_startup(args):
+    '''
+    time to prompt: a batch gdb that loads emacs (and the debugger) then exits
+
+    gdb finds auto-load scripts under scripts-directory by the objfile's
+    absolute path, so the auto-load variant gets a scratch directory with
+    emacs-gdb.py linked in at the right place
+    '''
+    emacs = os.path.realpath(shutil.which(args.emacs) or args.emacs)
+    results = []
+
+    with tempfile.TemporaryDirectory() as scripts_dir:
+        script = os.path.join(scripts_dir, emacs.lstrip(os.sep) + "-gdb.py")
+        os.makedirs(os.path.dirname(script))
+        os.symlink(os.path.join(REPO_DIR, "emacs-gdb.py"), script)
+
+        for variant in STARTUP_VARIANTS:
+            print(f"running startup {variant}", file=sys.stderr)
+            command = startup_command(args, variant, scripts_dir)
+            samples = []
+
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                proc = subprocess.run(command, cwd=REPO_DIR, stdin=subprocess.DEVNULL,
+                                      capture_output=True, text=True, timeout=args.timeout)
+                samples.append(time.perf_counter() - start)
+
+                if proc.returncode != 0 or "Undefined command" in proc.stderr:
+                    print(f"startup {variant}: gdb failed", proc.stderr[-2000:], sep="\n", file=sys.stderr)
+                    samples = []
+                    break
+
+            if samples:
+                results.append({ "scenario": "startup", "variant": variant, "samples": samples,
+                                 "median": statistics.median(samples) })
+
+    return results
+
+
+def run(args):
+    meta = {
+        "commit": output_of(["git", "rev-parse", "HEAD"]),
+        "dirty": bool(output_of(["git", "status", "--porcelain", "--untracked-files=no"])),
+        "gdb": (output_of([args.gdb, "--version"]) or "").splitlines()[:1],
+        "emacs": (output_of([args.emacs, "--version"]) or "").splitlines()[:1],
+        "python": platform.python_version(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "loop": args.loop, "steps": args.steps, "repeats": args.repeats,
+    }
+
+    results = []
+    if not args.only or "startup" in args.only:
+        results.extend(run_startup(args))
+
+    for scenario, entry, extra in RUNS:
+        if args.only and scenario not in args.only:
+            continue
+
+        print(f"running {scenario} {extra or ''}".strip(), file=sys.stderr)
+        results.extend(run_scenario(args, scenario, entry, extra))
+
+    with open(args.output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+
+    print(f"wrote {args.output}", file=sys.stderr)
+
+
+def headline(results):
+    '''
+    one comparable number per measurement, flattened to "scenario/what"
+    '''
+    numbers = {}
+
+    for result in results:
+        scenario = result["scenario"]
+
+        if scenario == "startup":
+            numbers[f"{scenario}/{result['variant']}"] = result["median"]
+        elif scenario == "break-overhead":
+            numbers[f"{scenario}/{result['variant']}"] = result["seconds"]
+        elif scenario == "step-latency":
+            for command in ["lisp-step", "lisp-next"]:
+                if "median" in result.get(command, {}):
+                    numbers[f"{scenario}/{command}"] = result[command]["median"]
+        elif scenario == "backtrace-depth":
+            for point in result["points"]:
+                for kind in ["specpdl", "c"]:
+                    numbers[f"{scenario}/{kind}@{point['lisp_depth']}"] = point[kind]["cold"]
+        elif scenario == "printer-size":
+            for point in result["points"]:
+                numbers[f"{scenario}/print@{point['length']}"] = point["print"]["cold"]
+
+    return numbers
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = headline(json.load(f)["results"])
+    with open(new_path) as f:
+        new = headline(json.load(f)["results"])
+
+    for key in sorted(set(old) | set(new)):
+        before, after = old.get(key), new.get(key)
+
+        if before is None or after is None:
+            print(f"{key:<40} {before!s:>12} {after!s:>12}")
+        else:
+            ratio = after / before if before else float("inf")
+            print(f"{key:<40} {before:>12.6f} {after:>12.6f} {ratio:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emacs", default=os.environ.get("EMACS", "emacs"), help="emacs binary (built with debug info)")
+    parser.add_argument("--gdb", default=os.environ.get("GDB", "gdb"))
+    parser.add_argument("-o", "--output", default="bench_output.json")
+    parser.add_argument("--only", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--loop", type=int, default=20000, help="iterations of the break-overhead loop")
+    parser.add_argument("--steps", type=int, default=20, help="lisp-step/lisp-next samples")
+    parser.add_argument("--repeats", type=int, default=3, help="warm repeats per measurement")
+    parser.add_argument("--timeout", type=int, default=600, help="seconds per gdb session")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
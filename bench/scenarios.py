@@ -0,0 +1,203 @@
+import gdb
+import json
+import os
+import statistics
+import time
+
+from c_elisp_debugger import main
+from c_elisp_debugger.lisp_layout import LispLayout
+from c_elisp_debugger.lisp_tags import LispTags
+from c_elisp_debugger.lisp_memory import LispMemory
+from c_elisp_debugger.lisp_memo import LispMemo
+from c_elisp_debugger.lisp_printer import LispPrinter
+from c_elisp_debugger.symbol_value import SymbolValue
+from c_elisp_debugger.specpdl import SpecpdlBacktrace
+from c_elisp_debugger.variable_lookup import VariableLookup
+from c_elisp_debugger.breakpoints import LispBreakpoint
+
+# sourced by bench/run.py after setup.gdb has imported the debugger (and
+# registered its manager). one scenario per gdb session, named in
+# BENCH_SCENARIO; results go to stdout as BENCH-RESULT lines
+
+BENCH_PREFIX = "BENCH-RESULT "
+
+
+def bench_config(name, default):
+    value = os.environ.get(name)
+    return default if value is None else int(value)
+
+
+def timed(command: str) -> float:
+    start = time.perf_counter()
+    gdb.execute(command, to_string=True)
+    return time.perf_counter() - start
+
+
+def timed_call(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def cold():
+    # what the first command after a stop pays for
+    LispMemory.flush()
+    LispMemo.flush()
+
+
+def summary(samples):
+    if not samples:
+        return {"samples": []}
+
+    return {
+        "samples": samples,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+    }
+
+
+def alive() -> bool:
+    return gdb.selected_inferior().pid != 0
+
+
+def report(name: str, **data):
+    print(BENCH_PREFIX + json.dumps({"scenario": name, **data}), flush=True)
+
+
+def without_manager():
+    # raw stops: the manager would otherwise push frames (and finish
+    # breakpoints) on every probe hit
+    gdb.events.stop.disconnect(main.manager.hit)
+
+
+def break_overhead():
+    '''
+    cost of lisp-break on a function that never runs, over a tight loop
+
+    the loop is timed from the first bench-probe hit to exit, with and
+    without the extra breakpoint (BENCH_VARIANT=baseline|break)
+    '''
+    variant = os.environ.get("BENCH_VARIANT", "break")
+    without_manager()
+
+    probe = LispBreakpoint.create("bench-probe")
+    gdb.execute("run", to_string=True)
+
+    for bp in probe:
+        bp.delete()
+
+    if variant == "break":
+        LispBreakpoint.create("bench-never-called")
+
+    elapsed = timed("continue")
+    report("break-overhead", variant=variant, iterations=bench_config("BENCH_LOOP", 20000),
+           seconds=elapsed)
+
+
+def step_latency():
+    '''
+    latency of lisp-step and lisp-next, one sample per command
+    '''
+    count = bench_config("BENCH_STEPS", 20)
+
+    main.manager.breakpoint("bench-step-target")
+    gdb.execute("run", to_string=True)
+
+    results = {}
+    for command in ["lisp-step", "lisp-next"]:
+        samples = []
+
+        for _ in range(count):
+            if not alive() or main.manager.empty():
+                break
+
+            try:
+                samples.append(timed(command))
+            except gdb.error as e:
+                print(f"{command} failed: {e}")
+                break
+
+        results[command] = summary(samples)
+
+    report("step-latency", **results)
+
+
+def backtrace_depth():
+    '''
+    lisp-backtrace (specpdl) and lisp-backtrace c (frame filter) against depth
+    '''
+    repeats = bench_config("BENCH_REPEATS", 3)
+    without_manager()
+
+    LispBreakpoint.create("bench-probe")
+    gdb.execute("run", to_string=True)
+
+    points = []
+    while alive():
+        depth = len(SpecpdlBacktrace())
+        point = {"lisp_depth": depth}
+
+        for name, command in [("specpdl", "lisp-backtrace"), ("c", "lisp-backtrace c")]:
+            cold()
+            first = timed(command)
+            warm = [timed(command) for _ in range(repeats)]
+            point[name] = {"cold": first, "warm": summary(warm)}
+
+        points.append(point)
+        gdb.execute("continue", to_string=True)
+
+    report("backtrace-depth", points=points)
+
+
+def printer_size():
+    '''
+    LispPrinter on lists of growing length, uncapped so every element is read
+    '''
+    repeats = bench_config("BENCH_REPEATS", 3)
+    without_manager()
+
+    LispBreakpoint.create("bench-probe")
+    gdb.execute("run", to_string=True)
+
+    points = []
+    while alive():
+        symbol = VariableLookup.lookup("bench-data")
+        word = SymbolValue.value(symbol.word)
+        length = 0
+
+        cursor = word
+        while LispTags.classify(cursor)[0] == "Lisp_Cons":
+            length += 1
+            cursor = LispMemory.word(LispTags.xpntr(cursor)
+                                     + LispLayout.offset("struct Lisp_Cons", "u.s.u.cdr"))
+
+        printer = LispPrinter(max_depth=4, max_length=length + 1)
+        point = {"length": length}
+
+        cold()
+        point["print"] = {"cold": timed_call(lambda: printer.print(word)),
+                          "warm": summary([timed_call(lambda: printer.print(word))
+                                           for _ in range(repeats)])}
+
+        cold()
+        point["lisp-print"] = {"cold": timed("lisp-print bench-data")}
+
+        points.append(point)
+        gdb.execute("continue", to_string=True)
+
+    report("printer-size", points=points)
+
+
+SCENARIOS = {
+    "break-overhead": break_overhead,
+    "step-latency": step_latency,
+    "backtrace-depth": backtrace_depth,
+    "printer-size": printer_size,
+}
+
+if __name__ == "__main__":
+    gdb.execute("set pagination off")
+    gdb.execute("set confirm off")
+
+    SCENARIOS[os.environ["BENCH_SCENARIO"]]()
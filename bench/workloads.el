@@ -0,0 +1,59 @@
+;;; workloads.el --- scripted workloads for the debugger benchmarks  -*- lexical-binding: t -*-
+
+;; every scenario is started with `emacs -Q --batch -l workloads.el -f bench-SCENARIO'
+;; sizes come from the environment so the driver can scale them
+
+(defvar bench-data nil
+  "Object the printer scenario prints.")
+
+(defun bench-env (name default)
+  (let ((value (getenv name)))
+    (if value (string-to-number value) default)))
+
+(defun bench-probe (&optional _tag)
+  "Breakpointed by the scenarios; does nothing itself."
+  nil)
+
+(defun bench-never-called ()
+  "Breakpointed to measure what an un-hit `lisp-break' costs."
+  nil)
+
+(defun bench-step-target (n)
+  "Small nested body for stepping through."
+  (let ((total 0))
+    (dotimes (i n)
+      (setq total (+ total (* i 2))))
+    (list total (length (number-sequence 1 n)))))
+
+(defun bench-recurse (depth)
+  (if (> depth 0)
+      (1+ (bench-recurse (1- depth)))
+    (bench-probe depth)
+    0))
+
+;;; scenarios
+
+(defun bench-loop ()
+  "Tight interpreted loop: lots of eval_sub and funcall_subr."
+  (bench-probe 'start)
+  (let ((total 0))
+    (dotimes (i (bench-env "BENCH_LOOP" 20000))
+      (setq total (+ total (% i 7) (max i 3))))
+    total))
+
+(defun bench-step ()
+  (bench-step-target (bench-env "BENCH_STEP_N" 5)))
+
+(defun bench-backtrace ()
+  (let ((max-lisp-eval-depth 100000)
+        (max-specpdl-size 1000000))
+    (dolist (depth '(10 100 500 1000))
+      (bench-recurse depth))))
+
+(defun bench-printer ()
+  (dolist (size '(10 100 1000 10000))
+    (setq bench-data (mapcar (lambda (i) (cons i (format "item-%d" i)))
+                             (number-sequence 1 size)))
+    (bench-probe size)))
+
+;;; workloads.el ends here
@@ -0,0 +1,26 @@
+'''
+An integrated C & Lisp debugger for Emacs, as a gdb python package
+
+importing it registers every command and parameter straight away: types,
+constants and addresses are only looked up the first time something needs
+them, so it can be imported before emacs (or its debug info) is loaded.
+emacs-gdb.py (next to this package) imports it as an objfile auto-load
+script, setup.gdb imports it by hand
+'''
+try:
+    import gdb
+except ImportError:
+    # outside gdb only the standalone tools work (python3 -m c_elisp_debugger.trace_log)
+    gdb = None
+
+if gdb is not None:
+    # in dependency order: modules import from the ones above them, and the
+    # few that need one below import it at their bottom
+    from . import (lisp_layout, lisp_target, lisp_stats, lisp_tags, lisp_memory, lisp_gc,
+                   lisp_memo, internal_text, lisp_printer, hash_table, buffer_text, lisp_symbols,
+                   symbol_value, lisp_types, lisp_functions, specpdl, variable_lookup,
+                   backtrace, lisp_profile, breakpoints, trace_log, lisp_trace, lisp_watch,
+                   nav_pool, nav_frame, nav_manager, commands)
+    from .main import register
+
+    register()
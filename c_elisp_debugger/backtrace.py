@@ -0,0 +1,138 @@
+import gdb
+import itertools
+from gdb.FrameDecorator import FrameDecorator
+
+from .lisp_functions import CFunctions, InvalidArgsError, LispArg, LispFunction
+
+class LispFrameFilter:
+    # decoded frames for the current stop, see LispFrameFilter.decoded
+    cache = {}
+
+    def __init__(self, enabled=True):
+        self.name = "lisp-objects"
+        self.enabled = enabled
+        self.priority = 100
+
+        gdb.frame_filters[self.name] = self
+
+    def filter(self, frames):
+        # stays a generator: `backtrace N` stops pulling after N frames, and
+        # nothing gets decoded until gdb asks a decorator for a column
+        for frame in frames:
+            if CFunctions.cool_func(frame.function()):
+                yield LispFrameDecorator(frame.inferior_frame())
+
+    @staticmethod
+    def decoded(frame: gdb.Frame) -> dict:
+        '''
+        per-stop cache of everything decoded for a C frame
+
+        keyed on pc + stack pointer, which is stable until the inferior runs
+        '''
+        key = (frame.pc(), int(frame.read_register("sp")))
+
+        if key not in LispFrameFilter.cache:
+            LispFrameFilter.cache[key] = { "function": LispFunction.create(frame) }
+
+        return LispFrameFilter.cache[key]
+
+    @staticmethod
+    def flush(event=None):
+        LispFrameFilter.cache.clear()
+
+
+class LispFrameDecorator(FrameDecorator):
+    def __init__(self, frame: gdb.Frame):
+        super().__init__(frame)
+
+        self.lisp_frame = frame
+
+    @property
+    def lisp_function(self):
+        return LispFrameFilter.decoded(self.lisp_frame)["function"]
+
+    def address(self):
+        return None
+
+    def filename(self):
+        return None
+
+    def line(self):
+        return None
+
+    def function(self):
+        # a bad frame shouldn't kill the rest of the backtrace
+        try:
+            decoded = LispFrameFilter.decoded(self.lisp_frame)
+
+            if "name" not in decoded:
+                decoded["name"] = self.lisp_function.name()
+
+            return decoded["name"]
+        except gdb.error as e:
+            return f"{self.lisp_frame.name()} <{e}>"
+
+    def frame_args(self):
+        try:
+            decoded = LispFrameFilter.decoded(self.lisp_frame)
+
+            if "args" not in decoded:
+                decoded["args"] = self.truncated_args()
+
+            return decoded["args"]
+        except gdb.error:
+            return [LispArg("?", "#<unreadable>")]
+
+    def truncated_args(self):
+        limit = MaxArgsParameter.limit()
+
+        try:
+            args = self.lisp_function.args_list()
+        except InvalidArgsError as e:
+            args = e.args
+
+        if limit is None:
+            return list(args)
+
+        # one extra so we know whether anything got cut off
+        kept = list(itertools.islice(args, limit + 1))
+
+        if len(kept) > limit:
+            kept = kept[:limit] + [LispArg("...", "(truncated)")]
+
+        return kept
+
+
+class MaxArgsParameter(gdb.Parameter):
+    '''
+    Maximum number of Lisp arguments shown per frame in lisp-backtrace
+    '''
+    set_doc = "Set the maximum number of Lisp arguments shown per backtrace frame."
+    show_doc = "Show the maximum number of Lisp arguments shown per backtrace frame."
+
+    instance = None
+
+    def __init__(self):
+        super().__init__("lisp-backtrace-max-args", gdb.COMMAND_STACK, gdb.PARAM_ZUINTEGER_UNLIMITED)
+        self.value = 8
+
+        MaxArgsParameter.instance = self
+
+    def get_show_string(self, svalue):
+        return f"Lisp arguments per backtrace frame: {svalue}"
+
+    @staticmethod
+    def limit():
+        if MaxArgsParameter.instance is None:
+            return None
+
+        value = MaxArgsParameter.instance.value
+        # unlimited shows up as None (or -1 on older gdbs)
+        return None if value is None or value < 0 else value
+
+
+gdb.events.cont.connect(LispFrameFilter.flush)
+gdb.events.memory_changed.connect(LispFrameFilter.flush)
+gdb.events.register_changed.connect(LispFrameFilter.flush)
+gdb.events.inferior_call.connect(LispFrameFilter.flush)
+gdb.events.exited.connect(LispFrameFilter.flush)
@@ -0,0 +1,179 @@
+import gdb
+from typing import Dict, Optional, Set
+
+from .lisp_functions import CFunctions
+from .variable_lookup import VariableLookup
+
+class LispBreakpoint:
+    '''
+    A user-level breakpoint on a Lisp function at one C entry point
+
+    doesn't own a gdb breakpoint: every LispBreakpoint on the same entry point
+    shares a single LispDispatch, so the cost of a stop doesn't grow with the
+    number of functions being watched
+    '''
+    def __init__(self, func_name: str, c_func: CFunctions, tracer=None):
+        self.func_name = func_name
+        self.c_func = c_func
+        self.func_class = c_func.wrapper()
+
+        # what the entry point's argument gets compared against
+        # (symbol word for eval_sub, subr address for funcall_subr)
+        self.target = None
+        self._enabled = True
+
+        # something with a called(bp) method gets told about hits instead
+        # of the inferior stopping (see LispTrace)
+        self.tracer = tracer
+
+        print(f"set breakpoint: {self}")
+
+        self.dispatch = LispDispatch.get(c_func)
+        self.resolve()
+        self.dispatch.add(self)
+
+    def resolve(self):
+        '''
+        Looks the function's symbol up once, so stops never deal in names
+
+        only possible with a live process where the symbol is already interned.
+        otherwise the dispatcher compares names until the first match
+        '''
+        if gdb.selected_inferior().pid == 0:
+            return
+
+        try:
+            symbol = VariableLookup.lookup(self.func_name, "globals.f_Vobarray")
+        except gdb.error:
+            return
+
+        if symbol is not None:
+            self.target = self.func_class.target_for(symbol.word)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        self._enabled = value
+        self.dispatch.refresh()
+
+    def is_valid(self) -> bool:
+        return self.dispatch.owns(self)
+
+    def delete(self):
+        self.dispatch.remove(self)
+
+    def __str__(self):
+        return f"{self.func_name} [in {self.c_func.value}]"
+
+    @staticmethod
+    def create(func_name, tracer=None):
+        return (LispBreakpoint(func_name, CFunctions.EVAL_SUB, tracer),
+                LispBreakpoint(func_name, CFunctions.FUNCALL_SUBR, tracer))
+
+
+class LispDispatch(gdb.Breakpoint):
+    '''
+    The one internal breakpoint on a C entry point
+
+    stop() looks the current target up in a dict of watched targets, and
+    leaves the LispBreakpoint that matched in self.matched for the manager.
+    tracing breakpoints get their hit handed over, and only stop when the
+    tracer needs the stop event to set up for the return (tracing_stop)
+    '''
+    dispatchers: Dict[CFunctions, "LispDispatch"] = {}
+
+    def __init__(self, c_func: CFunctions):
+        self.c_func = c_func
+        self.func_class = c_func.wrapper()
+
+        self.targets: Dict[int, Set[LispBreakpoint]] = {}
+        # breakpoints we couldn't resolve yet, by function name
+        self.unresolved: Dict[str, Set[LispBreakpoint]] = {}
+        self.matched: Optional[LispBreakpoint] = None
+        self.tracing_stop = False
+
+        super().__init__(c_func.value, internal=True)
+
+    @staticmethod
+    def get(c_func: CFunctions) -> "LispDispatch":
+        dispatch = LispDispatch.dispatchers.get(c_func)
+
+        if dispatch is None or not dispatch.is_valid():
+            dispatch = LispDispatch(c_func)
+            LispDispatch.dispatchers[c_func] = dispatch
+
+        return dispatch
+
+    def add(self, bp: LispBreakpoint):
+        if bp.target is None:
+            self.unresolved.setdefault(bp.func_name, set()).add(bp)
+        else:
+            self.targets.setdefault(bp.target, set()).add(bp)
+
+        self.refresh()
+
+    def remove(self, bp: LispBreakpoint):
+        for table, key in [(self.targets, bp.target), (self.unresolved, bp.func_name)]:
+            bps = table.get(key)
+
+            if bps is not None:
+                bps.discard(bp)
+                if not bps:
+                    del table[key]
+
+        self.refresh()
+
+    def owns(self, bp: LispBreakpoint) -> bool:
+        return (bp in self.targets.get(bp.target, ())
+                or bp in self.unresolved.get(bp.func_name, ()))
+
+    def refresh(self):
+        '''
+        only keep the gdb breakpoint armed while someone is listening
+        '''
+        watching = any(bp.enabled
+                       for table in (self.targets, self.unresolved)
+                       for bps in table.values()
+                       for bp in bps)
+
+        if self.is_valid() and self.enabled != watching:
+            self.enabled = watching
+
+    def stop(self):
+        self.matched = None
+        self.tracing_stop = False
+        target = self.func_class.current_target()
+
+        bps = self.targets.get(target)
+        if bps is None and self.unresolved:
+            bps = self.match_unresolved(target)
+
+        for bp in list(bps or ()):
+            if not bp.enabled:
+                continue
+
+            if bp.tracer is not None:
+                self.tracing_stop |= bp.tracer.called(bp)
+            elif self.matched is None:
+                self.matched = bp
+
+        # a tracing stop is only interim when nobody else matched
+        self.tracing_stop &= self.matched is None
+        return self.matched is not None or self.tracing_stop
+
+    def match_unresolved(self, target) -> Optional[Set[LispBreakpoint]]:
+        # slow path: the first match by name tells us what to compare against
+        name = self.func_class.current_name()
+        bps = self.unresolved.pop(name, None)
+
+        if not bps:
+            return None
+
+        for bp in bps:
+            bp.target = target
+            self.targets.setdefault(target, set()).add(bp)
+
+        return bps
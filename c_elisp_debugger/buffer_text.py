@@ -0,0 +1,145 @@
+import gdb
+from typing import Optional, Tuple, Union
+
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_memory import LispMemory
+from .lisp_printer import LispPrinter, ListWalk
+from .internal_text import InternalText
+from .symbol_value import SymbolValue
+
+class BufferText:
+    '''
+    A struct buffer's text, read straight out of memory
+
+    the text is one allocation with a gap in it where editing happens:
+    bytes before GPT_BYTE start at BEG_ADDR, the rest sit GAP_SIZE bytes
+    further along. any byte range is then at most two bulk reads, one on
+    each side of the gap, however big the buffer is
+
+    positions are byte positions, starting from 1 like emacs'
+    (position-bytes). indirect buffers share their base buffer's text, which
+    buffer->text already points at
+    '''
+    struct_name = "struct buffer"
+    text_name = "struct buffer_text"
+
+    def __init__(self, word: int):
+        self.word = word
+        self.addr = LispTags.xpntr(word)
+
+    #MARK: fields
+
+    def field(self, name: str) -> int:
+        return LispMemory.word(self.addr + LispLayout.offset(self.struct_name, name), signed=True)
+
+    def text_field(self, name: str) -> int:
+        text = LispMemory.pointer(self.addr + LispLayout.offset(self.struct_name, "text"))
+        return LispMemory.word(text + LispLayout.offset(self.text_name, name), signed=True)
+
+    def name(self) -> Optional[str]:
+        '''
+        the buffer's name, or None once it's been killed
+        '''
+        word = LispMemory.word(self.addr + LispLayout.offset(self.struct_name, "name_"))
+
+        if word == LispLayout.nil_word():
+            return None
+
+        return LispPrinter.string_contents(word, 1024)[0]
+
+    def multibyte(self) -> bool:
+        word = LispMemory.word(self.addr + LispLayout.offset(self.struct_name, "enable_multibyte_characters_"))
+        return word != LispLayout.nil_word()
+
+    def accessible(self) -> Tuple[int, int]:
+        '''
+        BEGV_BYTE and ZV_BYTE, the bounds narrowing leaves
+        '''
+        return self.bound("begv_byte", "begv_marker_"), self.bound("zv_byte", "zv_marker_")
+
+    def bound(self, field: str, marker: str) -> int:
+        '''
+        one of the narrowing bounds, the way BUF_BEGV_BYTE reads it
+
+        an indirect buffer (or the base of one) that isn't current keeps
+        them in markers, since edits through the other buffers move them.
+        the struct fields are only up to date otherwise
+        '''
+        if self.addr != SymbolValue.current_buffer():
+            word = LispMemory.word(self.addr + LispLayout.offset(self.struct_name, marker))
+
+            if word != LispLayout.nil_word():
+                bytepos = LispTags.xpntr(word) + LispLayout.offset("struct Lisp_Marker", "bytepos")
+                return LispMemory.word(bytepos, signed=True)
+
+        return self.field(field)
+
+    def z_byte(self) -> int:
+        return self.text_field("z_byte")
+
+    # /fields
+
+    #MARK: reading
+
+    def read(self, start: int, end: int) -> Union[bytes, memoryview]:
+        '''
+        bytes [start, end) of the whole text, ignoring narrowing
+
+        only a range that straddles the gap gets copied to join it up
+        '''
+        start = max(start, 1)
+        end = min(end, self.z_byte())
+
+        if start >= end:
+            return b""
+
+        beg = self.text_field("beg")
+        gpt_byte = self.text_field("gpt_byte")
+        gap_size = self.text_field("gap_size")
+
+        parts = []
+
+        # before the gap
+        if start < gpt_byte:
+            parts.append(LispMemory.read_direct(beg + start - 1, min(end, gpt_byte) - start))
+
+        # after it
+        if end > gpt_byte:
+            after = max(start, gpt_byte)
+            parts.append(LispMemory.read_direct(beg + gap_size + after - 1, end - after))
+
+        return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def text(self, start: Optional[int] = None, end: Optional[int] = None) -> str:
+        '''
+        decoded text of [start, end), the accessible portion by default
+        '''
+        begv_byte, zv_byte = self.accessible()
+
+        raw = self.read(begv_byte if start is None else start, zv_byte if end is None else end)
+        return InternalText.decode(raw, self.multibyte())
+
+    # /reading
+
+    @staticmethod
+    def find(name: str) -> Optional[int]:
+        '''
+        word of the live buffer called name, from Vbuffer_alist
+        '''
+        alist = LispMemory.word(LispLayout.address("Vbuffer_alist"))
+        cdr = LispLayout.offset("struct Lisp_Cons", "u.s.u.cdr")
+        car = LispLayout.offset("struct Lisp_Cons", "u.s.car")
+
+        for _, entry in ListWalk(alist):
+            # (name . buffer)
+            if LispTags.classify(entry)[0] != "Lisp_Cons":
+                continue
+
+            buffer = LispMemory.word(LispTags.xpntr(entry) + cdr)
+            buffer_name = LispMemory.word(LispTags.xpntr(entry) + car)
+
+            if LispPrinter.string_contents(buffer_name, 1024)[0] == name:
+                return buffer
+
+        return None
@@ -0,0 +1,67 @@
+import gdb
+import sys
+
+from . import main
+from .lisp_layout import LispLayout
+from .lisp_stats import LispStats
+from .lisp_memory import LispMemory
+from .lisp_gc import LispGC
+from .lisp_memo import LispMemo
+from .lisp_symbols import SymbolNames
+from .lisp_types import LispObject
+from .variable_lookup import VariableLookup
+from .backtrace import LispFrameFilter
+from .lisp_trace import LispTrace
+
+def unload():
+    '''
+    takes the loaded package down so it can be imported afresh
+
+    setup.gdb calls this when it's sourced again. gdb keeps hold of event
+    handlers (and anything we patched) whatever happens to the modules,
+    so those have to go by hand
+    '''
+    try:
+        resp = input("removing all breakpoints, do you want to proceed? [y/N] > ").strip().lower()
+    except EOFError:
+        resp = ""
+
+    if resp == "y":
+        for bp in gdb.breakpoints():
+            bp.delete()
+
+    if main.manager is not None:
+        gdb.events.stop.disconnect(main.manager.hit)
+
+    gdb.events.new_objfile.disconnect(LispLayout.invalidate)
+    gdb.events.clear_objfiles.disconnect(LispLayout.invalidate)
+
+    for event in [gdb.events.cont, gdb.events.memory_changed,
+                  gdb.events.inferior_call, gdb.events.exited]:
+        event.disconnect(LispMemory.flush)
+        event.disconnect(LispMemo.flush)
+        event.disconnect(LispFrameFilter.flush)
+
+    gdb.events.exited.disconnect(SymbolNames.reset)
+    gdb.events.exited.disconnect(LispGC.reset)
+    gdb.events.memory_changed.disconnect(LispMemo.forget)
+    gdb.events.exited.disconnect(LispMemo.forget)
+    gdb.events.register_changed.disconnect(LispFrameFilter.flush)
+    gdb.events.exited.disconnect(VariableLookup.reset)
+    gdb.events.exited.disconnect(LispObject.reset_flyweights)
+
+    for trace in LispTrace.traces.values():
+        trace.writer.close()
+    gdb.events.stop.disconnect(LispTrace.stopped)
+    gdb.events.stop.disconnect(LispTrace.flush)
+    gdb.events.exited.disconnect(LispTrace.flush)
+    gdb.events.exited.disconnect(LispTrace.exited)
+
+    # puts the original functions back and drops its event handlers
+    LispStats.enable(False)
+
+    package = __name__.rpartition(".")[0]
+    for name in [name for name in sys.modules if name == package or name.startswith(package + ".")]:
+        del sys.modules[name]
+
+    print("cleaned up the last stuff")
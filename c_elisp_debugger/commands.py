@@ -0,0 +1,514 @@
+import gdb
+import re
+
+from .lisp_target import LispTarget
+from .lisp_stats import LispStats
+from .lisp_tags import LispTags
+from .lisp_printer import LispPrinter
+from .hash_table import HashTable
+from .buffer_text import BufferText
+from .lisp_types import LispBuffer, LispHashTable, LispObject
+from .specpdl import SpecpdlBacktrace
+from .variable_lookup import VariableLookup
+from .backtrace import LispFrameFilter
+from .lisp_profile import LispProfiler, ProfileFrequencyParameter
+from .lisp_trace import LispTrace
+from .lisp_watch import LispWatch
+from .nav_pool import BreakpointRole
+
+class PrintCommand(gdb.Command):
+    usage = ("invalid usage: lisp-print [--depth N] [--length N] [--string N] "
+             "[--from N] [--count N] [--stream] (<var-name> [<key>] | internal <var-name>)")
+
+    # option -> (attribute, takes a number)
+    options = {
+        "--depth": ("max_depth", True),
+        "--length": ("max_length", True),
+        "--string": ("max_string", True),
+        "--from": ("start", True),
+        "--count": ("count", True),
+        "--stream": ("stream", False),
+    }
+
+    # deeper than this and python runs out of stack
+    max_depth = 200
+
+    def __init__(self):
+        super().__init__("lisp-print", gdb.COMMAND_DATA)
+
+    def invoke(self, argument, from_tty):
+        try:
+            settings, args = self.parse(argument.split())
+        except ValueError:
+            print(self.usage)
+            return
+
+        if len(args) == 1:
+            self.print_lisp(args[0], settings)
+        elif len(args) == 2 and args[0] == "internal":
+            self.print_c(args[1], settings)
+        elif len(args) >= 2:
+            # a string key can have spaces in it
+            self.print_entry(args[0], " ".join(args[1:]), settings)
+        else:
+            print(self.usage)
+
+    def parse(self, args):
+        settings = { "max_depth": 8, "max_length": 50, "max_string": 200,
+                     "start": None, "count": None, "stream": False }
+        rest = []
+
+        args = iter(args)
+        for arg in args:
+            if arg not in self.options:
+                rest.append(arg)
+                continue
+
+            attr, numeric = self.options[arg]
+            settings[attr] = int(next(args, "")) if numeric else True
+
+            if numeric and settings[attr] < 0:
+                raise ValueError(arg)
+
+        settings["max_depth"] = min(settings["max_depth"], self.max_depth)
+        return settings, rest
+
+    def complete(self, text, word):
+        last = text.split(" ")[-1]
+
+        if last.startswith("-"):
+            return [option for option in self.options if option.startswith(last)]
+
+        if "internal" in text.split(" ")[:-1]:
+            return gdb.COMPLETE_SYMBOL
+
+        # gdb splits words on '-', but lisp names are full of them,
+        # so match on the whole argument and hand back just the tail
+        cut = len(last) - len(word)
+
+        return [name[cut:] for name in VariableLookup.completions(last)]
+
+    def print_lisp(self, name, settings):
+        val = VariableLookup.get_val(name)
+
+        if val is None:
+            print(f"object {name} does not exist (or is void)")
+        else:
+            self.print_word(val.word, settings)
+
+    def print_entry(self, name, key, settings):
+        '''
+        looks key up in a hash table without calling into emacs
+
+        key is a fixnum, a "string" (matched by contents) or a symbol name
+        '''
+        val = VariableLookup.get_val(name)
+
+        if not isinstance(val, LispHashTable):
+            print(f"{name} is not a hash table")
+            return
+
+        table = val.table()
+
+        if key.startswith('"') and key.endswith('"') and len(key) > 1:
+            value = table.get(None, HashTable.string_key(key[1:-1]))
+        elif re.fullmatch(r"-?\d+", key):
+            value = table.get(LispTags.make_fixnum(int(key)))
+        else:
+            symbol = VariableLookup.lookup(key.removeprefix("'"))
+            value = None if symbol is None else table.get(symbol.word)
+
+        if value is None:
+            print(f"{key} is not in {name}")
+        else:
+            printer = LispPrinter(settings["max_depth"], settings["max_length"], settings["max_string"],
+                                  mark_shared=True)
+            print(printer.print(value))
+
+    def print_c(self, name, settings):
+        try:
+            obj = LispObject.from_var(name)
+        except ValueError:
+            print(f"variable {name} does not exist")
+            return
+
+        if obj.tagged or obj.tagging_allowed():
+            self.print_word(obj.tag().word, settings)
+        else:
+            print(obj)
+
+    def print_word(self, word, settings):
+        printer = LispPrinter(settings["max_depth"], settings["max_length"], settings["max_string"],
+                              mark_shared=True)
+        paging = settings["start"] is not None or settings["count"] is not None
+
+        if not (paging or settings["stream"]):
+            print(printer.print(word))
+        elif LispTags.classify(word)[0] == "Lisp_String":
+            # like paging a sequence, no count means a screenful
+            count = settings["max_string"] if settings["count"] is None else settings["count"]
+            text, more = LispPrinter.string_slice(word, settings["start"] or 0, count)
+            print(f'"{text}{"..." if more else ""}"')
+        elif LispPrinter.brackets(word) is None and LispTags.classify(word)[1] != "PVEC_HASH_TABLE":
+            print(printer.print(word))
+        else:
+            self.print_elements(word, printer, settings)
+
+    def print_elements(self, word, printer, settings):
+        '''
+        prints a range of a sequence's elements, each one as soon as it's
+        decoded when streaming. sharing is only marked within an element
+
+        a hash table's elements are its entries, printed as key value
+        '''
+        start = settings["start"] or 0
+        count = settings["count"]
+
+        # paging without a count shows a screenful
+        if count is None and not settings["stream"]:
+            count = printer.max_length
+
+        # one extra to know whether there's more
+        fetch = None if count is None else count + 1
+
+        if LispTags.classify(word)[1] == "PVEC_HASH_TABLE":
+            table = HashTable(word)
+            opening, closing = table.summary()[:-1] + " data (", "))"
+            elements = table.entries(start, fetch)
+            render = lambda entry: f"{printer.print(entry[0])} {printer.print(entry[1])}"
+        else:
+            opening, closing = LispPrinter.brackets(word)
+            elements = LispPrinter.elements(word, start, fetch)
+            render = printer.print
+        parts = [opening + ("... " if start else "")]
+        shown = 0
+
+        try:
+            for element in elements:
+                if count is not None and shown == count:
+                    parts.append(" ...")
+                    break
+
+                parts.append((" " if shown else "") + render(element))
+                shown += 1
+
+                if settings["stream"]:
+                    gdb.write("".join(parts))
+                    gdb.flush()
+                    parts = []
+        except KeyboardInterrupt:
+            parts.append(" ...<interrupted>")
+
+        gdb.write("".join(parts) + closing + "\n")
+
+class BufferTextCommand(gdb.Command):
+    usage = "invalid usage: lisp-buffer-text (<var-name> | <buffer-name>) [START END]"
+
+    def __init__(self):
+        super().__init__("lisp-buffer-text", gdb.COMMAND_DATA)
+
+    def invoke(self, argument, from_tty):
+        args = argument.split()
+        start = end = None
+
+        # buffer names can have spaces in them, positions can't
+        if len(args) >= 3 and all(arg.isdigit() for arg in args[-2:]):
+            start, end = int(args[-2]), int(args[-1])
+            args = args[:-2]
+
+        if not args:
+            print(self.usage)
+            return
+
+        name = " ".join(args)
+        text = self.find(name)
+
+        if text is None:
+            print(f"no buffer {name}")
+        elif text.name() is None:
+            print(f"{name} is a killed buffer")
+        else:
+            contents = text.text(start, end)
+            gdb.write(contents if contents.endswith("\n") else contents + "\n")
+
+    def complete(self, text, word):
+        last = text.split(" ")[-1]
+        cut = len(last) - len(word)
+
+        return [name[cut:] for name in VariableLookup.completions(last)]
+
+    def find(self, name):
+        '''
+        a variable holding a buffer, or else the buffer called name
+        '''
+        if name.startswith('"') and name.endswith('"') and len(name) > 1:
+            word = BufferText.find(name[1:-1])
+            return None if word is None else BufferText(word)
+
+        val = VariableLookup.get_val(name)
+
+        if isinstance(val, LispBuffer):
+            return val.buffer_text()
+
+        word = BufferText.find(name)
+        return None if word is None else BufferText(word)
+
+class BreakCommand(gdb.Command):
+    def __init__(self, manager):
+        super().__init__("lisp-break", gdb.COMMAND_BREAKPOINTS)
+
+        self.manager = manager
+
+    def invoke(self, argument, from_tty):
+        if not LispTarget.require_live("lisp-break"):
+            return
+
+        if argument:
+            self.manager.breakpoint(argument)
+        else:
+            print("must give the name of a function!")
+
+class BacktraceCommand(gdb.Command):
+    def __init__(self, manager):
+        super().__init__("lisp-backtrace", gdb.COMMAND_STACK)
+
+        self.manager = manager
+        self.filter = LispFrameFilter(enabled=False)
+
+    def invoke(self, argument, from_tty):
+        args = argument.split()
+
+        if argument == "current":
+            print(self.manager.frame_list(backtrace=True))
+        elif args and args[0] == "c":
+            self.c_backtrace(" ".join(args[1:]))
+        elif len(args) == 2 and args[0] == "frame" and re.fullmatch(r"\d+", args[1]):
+            self.lisp_frame(int(args[1]))
+        elif len(args) < 2 and all(re.fullmatch(r"-?\d+", arg) for arg in args):
+            self.lisp_backtrace(int(args[0]) if args else None)
+        else:
+            print("invalid usage: lisp-backtrace [current | N | -N | frame N | c [N | -N]]")
+
+    def lisp_backtrace(self, count):
+        for frame in SpecpdlBacktrace().frames(count):
+            print(f"#{frame.level:<3} {frame}")
+
+    def lisp_frame(self, level):
+        backtrace = SpecpdlBacktrace()
+
+        if level >= len(backtrace):
+            print(f"no frame at level {level} (only {len(backtrace)} frames)")
+        else:
+            print(f"#{level:<3} {backtrace.frame(level)}")
+
+    def c_backtrace(self, limit):
+        if limit and not re.fullmatch(r"-?\d+", limit):
+            print("invalid argument: c [N | -N]")
+            return
+
+        # limits are passed on so gdb stops pulling frames early
+        self.filter.enabled = True
+        try:
+            gdb.execute(f"backtrace {limit}".strip())
+        finally:
+            self.filter.enabled = False
+
+class StepCommand(gdb.Command):
+    def __init__(self, manager):
+        super().__init__("lisp-step", gdb.COMMAND_RUNNING)
+        self.manager = manager
+
+    def invoke(self, argument, from_tty):
+        self.manager.step()
+
+class NextCommand(gdb.Command):
+    def __init__(self, manager):
+        super().__init__("lisp-next", gdb.COMMAND_RUNNING)
+        self.manager = manager
+
+    def invoke(self, argument, from_tty):
+        self.manager.next()
+
+class UpCommand(gdb.Command):
+    def __init__(self, manager):
+        super().__init__("lisp-up", gdb.COMMAND_RUNNING)
+        self.manager = manager
+
+    def invoke(self, argument, from_tty):
+        self.manager.up()
+
+class ContinueCommand(gdb.Command):
+    def __init__(self, manager):
+        super().__init__("lisp-continue", gdb.COMMAND_RUNNING)
+        self.manager = manager
+
+    def invoke(self, argument, from_tty):
+        self.manager.cont()
+
+class StatsCommand(gdb.Command):
+    def __init__(self):
+        super().__init__("lisp-stats", gdb.COMMAND_MAINTENANCE)
+
+    def invoke(self, argument, from_tty):
+        argument = argument.strip()
+
+        if argument == "reset":
+            LispStats.reset()
+            print("lisp-stats counters reset")
+        elif argument in ("", "totals", "stop", "commands"):
+            print(LispStats.report(argument or None))
+        else:
+            print("invalid usage: lisp-stats [totals | stop | commands | reset]")
+
+class ProfileCommand(gdb.Command):
+    '''
+    Sample the Lisp stack for a while: lisp-profile [SECONDS] [FILE]
+
+    runs the inferior for SECONDS (10 by default), interrupting it
+    lisp-profile-frequency times a second, and prints the stacks in
+    collapsed (flamegraph) format, or writes them to FILE
+
+    samples are taken by sending SIGINT to the inferior's pid from gdb's
+    host, so only native processes can be profiled: not core files, and
+    not gdbserver or other remote targets
+    '''
+    def __init__(self):
+        super().__init__("lisp-profile", gdb.COMMAND_RUNNING)
+
+    def invoke(self, argument, from_tty):
+        args = argument.split()
+
+        if len(args) > 2 or (args and not args[0].replace(".", "", 1).isdigit()):
+            print("invalid usage: lisp-profile [SECONDS] [FILE]")
+            return
+
+        if not LispTarget.require_native("lisp-profile"):
+            return
+
+        if gdb.selected_inferior().pid == 0:
+            print("the program is not being run")
+            return
+
+        seconds = float(args[0]) if args else 10.0
+        profiler = LispProfiler(ProfileFrequencyParameter.frequency())
+
+        print(f"profiling for {seconds:g}s at {ProfileFrequencyParameter.frequency()} samples/s...")
+        profiler.run(seconds)
+
+        if profiler.reason:
+            print(f"stopped early: {profiler.reason}")
+
+        if len(args) == 2:
+            with open(args[1], "w") as f:
+                f.write(profiler.collapsed() + "\n")
+
+            print(f"wrote {profiler.taken} samples ({len(profiler.samples)} stacks) to {args[1]}")
+        else:
+            print(profiler.collapsed())
+
+class TraceCommand(gdb.Command):
+    def __init__(self):
+        super().__init__("lisp-trace", gdb.COMMAND_TRACEPOINTS)
+
+    def invoke(self, argument, from_tty):
+        args = argument.split()
+
+        if not args:
+            self.list_traces()
+        elif args[0] == "stop" and len(args) <= 2:
+            self.stop_traces(args[1:])
+        elif len(args) <= 2:
+            self.start_trace(args[0], args[1] if len(args) == 2 else f"{args[0]}.ltrace")
+        else:
+            print("invalid usage: lisp-trace [FUNC [FILE] | stop [FUNC]]")
+
+    def list_traces(self):
+        if not LispTrace.traces:
+            print("nothing is being traced")
+
+        for trace in LispTrace.traces.values():
+            print(trace)
+
+    def start_trace(self, func_name, path):
+        if not LispTarget.require_live("lisp-trace"):
+            return
+
+        if func_name in LispTrace.traces:
+            print(f"already tracing {LispTrace.traces[func_name]}")
+            return
+
+        LispTrace(func_name, path)
+        print(f"tracing {func_name} to {path} (read it with: python3 -m c_elisp_debugger.trace_log {path} [--json])")
+
+    def stop_traces(self, names):
+        names = names or list(LispTrace.traces)
+
+        for name in names:
+            trace = LispTrace.traces.get(name)
+
+            if trace is None:
+                print(f"{name} is not being traced")
+            else:
+                trace.stop()
+                print(f"stopped tracing {trace}")
+
+class WatchCommand(gdb.Command):
+    def __init__(self, manager):
+        super().__init__("lisp-watch", gdb.COMMAND_BREAKPOINTS)
+
+        self.manager = manager
+
+    def invoke(self, argument, from_tty):
+        args = argument.split()
+
+        if not args:
+            if not LispWatch.watches:
+                print("nothing is being watched")
+
+            for watch in LispWatch.watches.values():
+                print(watch)
+        elif args[0] == "delete" and len(args) <= 2:
+            self.delete(args[1:])
+        elif len(args) == 1:
+            self.watch(args[0])
+        else:
+            print("invalid usage: lisp-watch [SYMBOL | delete [SYMBOL]]")
+
+    def complete(self, text, word):
+        prefix = text.strip()
+        cut = len(prefix) - len(word)
+
+        return [name[cut:] for name in VariableLookup.completions(prefix)]
+
+    def watch(self, name):
+        if not LispTarget.require_live("lisp-watch"):
+            return
+
+        if name in LispWatch.watches:
+            print(f"already watching {LispWatch.watches[name]}")
+            return
+
+        try:
+            watch = LispWatch.create(name)
+        except (ValueError, gdb.error) as e:
+            print(f"can't watch {name}: {e}")
+            return
+
+        self.manager.registry.register(watch.breakpoint, BreakpointRole.WATCH)
+        print(f"watching {watch}")
+
+    def delete(self, names):
+        for name in names or list(LispWatch.watches):
+            watch = LispWatch.watches.get(name)
+
+            if watch is None:
+                print(f"{name} is not being watched")
+            else:
+                bp = watch.breakpoint
+                watch.delete()
+
+                # the trap breakpoint is shared, so it only goes with the
+                # last trapped watch
+                if not bp.is_valid():
+                    self.manager.registry.deregister(bp)
+                print(f"stopped watching {name}")
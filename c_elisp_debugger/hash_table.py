@@ -0,0 +1,275 @@
+import gdb
+from typing import Callable, Iterator, Optional, Tuple
+
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_memory import LispMemory
+from .lisp_memo import LispMemo
+from .lisp_printer import LispPrinter
+from .lisp_symbols import SymbolNames
+
+class HashTable:
+    '''
+    A struct Lisp_Hash_Table read straight out of memory
+
+    handles both layouts: up to emacs 29 the keys/values, hashes, chains and
+    buckets are Lisp vectors (of fixnums), from emacs 30 they're plain C
+    arrays. either way empty slots have Qunbound as their key
+
+    the header is a handful of words, so summarising costs the same for any
+    size. entries are read a chunk of slots at a time, paging resumes from
+    the slot the last page stopped at (tables change between stops, so
+    those cursors only last a stop), and lookups follow the
+    table's own bucket chains when we can compute the key's hash (eq/eql on
+    symbols and fixnums), otherwise they scan
+    '''
+    struct_name = "struct Lisp_Hash_Table"
+    # slots per bulk read
+    chunk = 2048
+
+    def __init__(self, word: int):
+        self.word = word
+        self.addr = LispTags.xpntr(word)
+
+        kv_type = LispLayout.field_type(self.struct_name, "key_and_value").strip_typedefs()
+        self.arrays = kv_type.code == gdb.TYPE_CODE_PTR
+
+        self.count = self.integer("count")
+
+        if self.arrays:
+            self.size = self.integer("table_size")
+            self.kv = self.pointer("key_and_value")
+
+            test = self.pointer("test")
+            self.test_word = LispMemory.word(test + LispLayout.offset("struct hash_table_test", "name"))
+        else:
+            kv = self.lisp("key_and_value")
+            self.size = LispPrinter.vector_size(kv) // 2
+            self.kv = LispTags.xpntr(kv) + LispLayout.offset("struct Lisp_Vector", "contents")
+            self.test_word = self.lisp("test.name")
+
+        self.word_size = LispLayout.sizeof("Lisp_Object")
+        # which eq_hash variant matches what emacs stored, once we've checked
+        self.hashable: Optional[bool] = None
+        self.shifted = True
+
+    #MARK: fields
+
+    def integer(self, field: str) -> int:
+        field_type = LispLayout.field_type(self.struct_name, field).strip_typedefs()
+        signed = getattr(field_type, "is_signed", True)
+        code = {1: "b", 2: "h", 4: "i", 8: "q"}[field_type.sizeof]
+
+        endian = "<" if LispLayout.little_endian() else ">"
+        addr = self.addr + LispLayout.offset(self.struct_name, field)
+
+        return LispMemory.unpack(endian + (code if signed else code.upper()), addr)[0]
+
+    def pointer(self, field: str) -> int:
+        return LispMemory.pointer(self.addr + LispLayout.offset(self.struct_name, field))
+
+    def lisp(self, field: str) -> int:
+        return LispMemory.word(self.addr + LispLayout.offset(self.struct_name, field))
+
+    def test(self) -> str:
+        return SymbolNames.name(self.test_word)
+
+    # /fields
+
+    def summary(self) -> str:
+        return f"#s(hash-table test {self.test()} count {self.count} size {self.size})"
+
+    #MARK: entries
+
+    def slots(self, start_slot: int = 0) -> Iterator[Tuple[int, int, int]]:
+        '''
+        (slot, key, value) for every used slot from start_slot on
+        '''
+        unbound = SymbolNames.builtin("unbound")
+
+        for base in range(start_slot, self.size, self.chunk):
+            n = min(self.chunk, self.size - base)
+            words = LispMemory.words(self.kv + 2 * base * self.word_size, 2 * n)
+
+            for i in range(n):
+                key = words[2 * i]
+
+                if key != unbound:
+                    yield base + i, key, words[2 * i + 1]
+
+    def seek(self, start: int) -> int:
+        '''
+        slot of live entry start (or past it, if there aren't that many)
+
+        starts from the nearest cursor before it, and skips whole chunks by
+        counting their empty slots
+        '''
+        cursors = LispMemo.get("cursors", self.word, dict)
+        index, slot = max(((i, s) for i, s in cursors.items() if i <= start), default=(0, 0))
+        unbound = SymbolNames.builtin("unbound")
+
+        while index < start and slot < self.size:
+            n = min(self.chunk, self.size - slot)
+            keys = LispMemory.words(self.kv + 2 * slot * self.word_size, 2 * n)[0::2]
+            live = n - keys.count(unbound)
+
+            if index + live <= start:
+                index += live
+                slot += n
+                continue
+
+            for i, key in enumerate(keys):
+                if key != unbound:
+                    if index == start:
+                        slot += i
+                        break
+                    index += 1
+            break
+
+        cursors[start] = slot
+        return slot
+
+    def entries(self, start: int = 0, count: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        '''
+        (key, value) words of live entries [start, start + count)
+        '''
+        for index, (slot, key, value) in enumerate(self.slots(self.seek(start)), start):
+            if count is not None and index >= start + count:
+                # where the next page starts
+                LispMemo.get("cursors", self.word, dict)[index] = slot
+                return
+
+            yield key, value
+
+    def slot(self, i: int) -> Tuple[int, int]:
+        return tuple(LispMemory.words(self.kv + 2 * i * self.word_size, 2))
+
+    # /entries
+
+    #MARK: lookup
+
+    def eq_hash(self, key: int, shifted: bool) -> int:
+        '''
+        hashfn_eq, which is all eq and eql (for non-floats) ever use
+
+        XHASH has been both the raw word and the word minus its fixnum tag
+        bits, so which one is left to can_hash to find out
+        '''
+        LispTags.load()
+        tag = LispTags.xtype(key)
+
+        raw = key
+        if shifted:
+            # XUFIXNUM_RAW
+            raw = key >> (LispTags.gctypebits - 1) if LispTags.lsb_tag else key & self.ufixnum_mask()
+
+        x = raw ^ tag
+
+        if self.arrays:
+            # reduce_emacs_uint_to_hash_hash
+            return (x ^ (x >> 32)) & 0xffffffff if self.word_size == 8 else x & 0xffffffff
+
+        # stored as a fixnum again
+        return x & self.ufixnum_mask()
+
+    def ufixnum_mask(self) -> int:
+        # INTMASK
+        return (1 << (LispTags.valbits + 1)) - 1
+
+    def stored_hash(self, slot: int) -> int:
+        if self.arrays:
+            endian = "<" if LispLayout.little_endian() else ">"
+            return LispMemory.unpack(f"{endian}I", self.pointer("hash") + 4 * slot)[0]
+
+        hashes = LispTags.xpntr(self.lisp("hash")) + LispLayout.offset("struct Lisp_Vector", "contents")
+        return LispTags.xfixnum(LispMemory.word(hashes + slot * self.word_size)) & self.ufixnum_mask()
+
+    def can_hash(self) -> bool:
+        '''
+        whether our eq_hash agrees with what emacs stored for a live entry
+
+        guards against layouts we haven't seen: if it doesn't, we scan
+        '''
+        if self.hashable is None:
+            self.hashable = False
+            first = next(self.slots(), None)
+
+            if first is not None and self.test() in ("eq", "eql"):
+                stored = self.stored_hash(first[0])
+
+                for shifted in (True, False):
+                    if self.eq_hash(first[1], shifted) == stored:
+                        self.hashable, self.shifted = True, shifted
+                        break
+
+        return self.hashable
+
+    def chain(self, hash_code: int) -> Iterator[int]:
+        '''
+        slots in hash_code's bucket
+        '''
+        endian = "<" if LispLayout.little_endian() else ">"
+
+        if self.arrays:
+            bits = self.integer("index_bits")
+            bucket = ((hash_code * 2654435769) & 0xffffffff) >> (32 - bits)
+
+            index, nexts = self.pointer("index"), self.pointer("next")
+            slot = LispMemory.unpack(f"{endian}i", index + 4 * bucket)[0]
+
+            while slot >= 0:
+                yield slot
+                slot = LispMemory.unpack(f"{endian}i", nexts + 4 * slot)[0]
+        else:
+            index, nexts = self.lisp("index"), self.lisp("next")
+            contents = LispLayout.offset("struct Lisp_Vector", "contents")
+
+            bucket = hash_code % LispPrinter.vector_size(index)
+            slot = LispTags.xfixnum(LispMemory.word(LispTags.xpntr(index) + contents + bucket * self.word_size))
+
+            while slot >= 0:
+                yield slot
+                slot = LispTags.xfixnum(LispMemory.word(LispTags.xpntr(nexts) + contents + slot * self.word_size))
+
+    def get(self, key: Optional[int], matches: Optional[Callable[[int], bool]] = None) -> Optional[int]:
+        '''
+        value word for key, or None if it's not there
+
+        matches decides key equality for a scan (defaults to eq)
+        '''
+        immediate = matches is None and LispTags.classify(key)[0] in ("Lisp_Symbol", "Lisp_Int")
+
+        if immediate and self.can_hash():
+            for slot in self.chain(self.eq_hash(key, self.shifted)):
+                found, value = self.slot(slot)
+
+                if found == key:
+                    return value
+
+            return None
+
+        matches = matches or (lambda found: found == key)
+
+        for _, found, value in self.slots():
+            if matches(found):
+                return value
+
+        return None
+
+    @staticmethod
+    def string_key(text: str) -> Callable[[int], bool]:
+        '''
+        matches string keys by contents, for get
+        '''
+        encoded = text.encode("utf-8")
+
+        def matches(found: int) -> bool:
+            if LispTags.classify(found)[0] != "Lisp_String":
+                return False
+
+            raw, _, truncated = LispPrinter.string_bytes(found, len(encoded) + 1)
+            return raw == encoded and not truncated
+
+        return matches
+
+    # /lookup
@@ -0,0 +1,47 @@
+import codecs
+from typing import Tuple
+
+class InternalText:
+    '''
+    Text in emacs' internal representation (strings and buffers)
+
+    multibyte text is utf-8 stretched to 22 bit characters, plus raw
+    bytes stored as two bytes led by C0 or C1. python's utf-8 decoder
+    does the whole thing in one pass and only calls internal_char for
+    the sequences it doesn't know
+
+    no gdb in here, so it can be tested outside it
+    '''
+    @staticmethod
+    def decode(raw, multibyte: bool) -> str:
+        # str() rather than .decode, so memoryviews don't get copied first
+        return str(raw, "utf-8" if multibyte else "latin-1", "emacs-internal")
+
+    @staticmethod
+    def internal_char(error: UnicodeDecodeError) -> Tuple[str, int]:
+        raw, start = error.object, error.start
+        lead = raw[start]
+
+        def continues(index: int) -> bool:
+            return index < len(raw) and raw[index] & 0xC0 == 0x80
+
+        # raw byte, printed like emacs does
+        if lead in (0xC0, 0xC1) and continues(start + 1):
+            byte = 0x80 | (lead & 1) << 6 | raw[start + 1] & 0x3F
+            return f"\\{byte:o}", start + 2
+
+        length = 5 if lead == 0xF8 else 4 if lead >= 0xF0 else 3 if lead >= 0xE0 else 0
+
+        # surrogates and characters past unicode
+        if length and all(continues(start + i) for i in range(1, length)):
+            char = lead & (0x7F >> length)
+            for byte in raw[start + 1:start + length]:
+                char = char << 6 | byte & 0x3F
+
+            return f"\\x{char:x}", start + length
+
+        # not a character (e.g. a range starting mid-character)
+        return f"\\{lead:o}", start + 1
+
+
+codecs.register_error("emacs-internal", InternalText.internal_char)
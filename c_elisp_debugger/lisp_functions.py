@@ -2,6 +2,12 @@ import gdb
 from typing import List, Optional, Union
 from enum import Enum
 
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_memory import LispMemory
+from .lisp_symbols import SymbolNames
+from .lisp_types import LispCons, LispObject
+
 class LispFunction:
     def __init__(self, frame: gdb.Frame):
         self.frame = frame
@@ -63,19 +69,60 @@ class Eval(LispFunction):
         if isinstance(self.form, LispCons):
             yield from (LispArg(str(i), arg) for i, arg in enumerate(self.form.cdr().contents()))
         else:
-            return LispArg("body", self.form)
+            yield LispArg("body", self.form)
 
     def __str__(self) -> str:
         return str(self.form)
 
+    @staticmethod
+    def current_target() -> Optional[int]:
+        '''
+        the symbol being called by the current form (as a tagged word)
+        '''
+        form = LispTags.word(gdb.selected_frame().read_var("form"))
+
+        if LispTags.classify(form)[0] != "Lisp_Cons":
+            return None
+
+        car = LispMemory.peek(LispTags.xpntr(form) + LispLayout.offset("struct Lisp_Cons", "u.s.car"))
+
+        if LispTags.classify(car)[0] != "Lisp_Symbol":
+            return None
+
+        return car
+
+    @staticmethod
+    def target_for(symbol: int) -> Optional[int]:
+        return symbol
+
+    @staticmethod
+    def current_name() -> Optional[str]:
+        target = Eval.current_target()
+        return SymbolNames.name(target) if target is not None else None
+
     @staticmethod
     def check_name(name) -> bool:
-        if gdb.parse_and_eval("CONSP(form) && SYMBOLP(XCAR(form))"):
-            fun_name = gdb.parse_and_eval("SSDATA(SYMBOL_NAME(XCAR(form)))").string()
-            print(f"[EVAL] checking ({fun_name} ...) vs. ({name} ...)")
-            return fun_name == name
+        return Eval.current_name() == name
+
+    @staticmethod
+    def current_args(limit: int) -> List[int]:
+        '''
+        the (unevaluated) argument forms of the current form, as tagged words
+        '''
+        form = LispTags.word(gdb.selected_frame().read_var("form"))
+        car = LispLayout.offset("struct Lisp_Cons", "u.s.car")
+        cdr = LispLayout.offset("struct Lisp_Cons", "u.s.u.cdr")
 
-        return False
+        words = []
+        if LispTags.classify(form)[0] != "Lisp_Cons":
+            return words
+
+        rest = LispMemory.word(LispTags.xpntr(form) + cdr)
+        while len(words) < limit and LispTags.classify(rest)[0] == "Lisp_Cons":
+            words.append(LispMemory.word(LispTags.xpntr(rest) + car))
+            rest = LispMemory.word(LispTags.xpntr(rest) + cdr)
+
+        return words
 
 class Lambda(LispFunction):
     def __init__(self, frame: gdb.Frame):
@@ -113,19 +160,19 @@ class Lambda(LispFunction):
 
     def args_list(self) -> list:
         try:
-            args_typ = self.args.type.target().array(self.numargs)
-            args_arr = self.args.dereference().cast(args_typ)
+            words = LispMemory.words(int(self.args), int(self.numargs))
 
             #TODO: zip in self.arg_names if possible
-            args =  [LispArg(i, LispObject.create(args_arr[i]))
-                     for i in range(self.numargs)]
+            args =  [LispArg(i, LispObject.from_word(word))
+                     for i, word in enumerate(words)]
             return args
         except gdb.MemoryError:
             trash_args = [LispArg(i, "???") for i in range(self.numargs)]
             raise InvalidArgsError(self.frame, trash_args)
 
     def __str__(self) -> str:
-        return f"{self.name()} ({self.numargs}) {[(arg.symbol(), arg.value()) for arg in self.args_list()]}"
+        args = self.args_list()
+        return f"{self.name()} ({self.numargs}) {[(arg.symbol(), arg.value()) for arg in args]}"
 
 
 class Subr(LispFunction):
@@ -141,21 +188,53 @@ class Subr(LispFunction):
         return self.subr.name()
 
     def args_list(self) -> list:
-        args_typ = self.args.type.target().array(self.numargs)
-        args_arr = self.args.dereference().cast(args_typ)
+        words = LispMemory.words(int(self.args), int(self.numargs))
 
-        return [LispArg(i, LispObject.create(args_arr[i]))
-                for i in range(self.numargs)]
+        return [LispArg(i, LispObject.from_word(word))
+                for i, word in enumerate(words)]
 
     def __str__(self) -> str:
         return f"{self.name()} ({self.numargs}) {[(arg.symbol(), arg.value(), type(arg.value())) for arg in self.args_list()]}"
 
+    @staticmethod
+    def current_target() -> Optional[int]:
+        '''
+        address of the struct Lisp_Subr being called
+        '''
+        subr = gdb.selected_frame().read_var("subr")
+        return int(subr.cast(LispLayout.type("EMACS_UINT")))
+
+    @staticmethod
+    def target_for(symbol: int) -> Optional[int]:
+        '''
+        the subr in the symbol's function cell
+
+        lisp-defined functions never go through funcall_subr, so they get
+        a target nothing can match
+        '''
+        cell = LispTags.xsymbol(symbol) + LispLayout.offset("struct Lisp_Symbol", "u.s.function")
+        function = LispMemory.word(cell)
+
+        if LispTags.classify(function)[1] != "PVEC_SUBR":
+            return 0
+
+        return LispTags.xpntr(function)
+
+    @staticmethod
+    def current_name() -> Optional[str]:
+        name_ptr = Subr.current_target() + LispLayout.offset("struct Lisp_Subr", "symbol_name")
+        return LispMemory.c_string(LispMemory.pointer(name_ptr))
+
     @staticmethod
     def check_name(name) -> bool:
-        fun_name = gdb.parse_and_eval("subr->symbol_name").string()
-        print(f"[SUBR] checking ({fun_name} ...) vs. ({name} ...)")
+        return Subr.current_name() == name
+
+    @staticmethod
+    def current_args(limit: int) -> List[int]:
+        frame = gdb.selected_frame()
+        numargs = int(frame.read_var("numargs"))
 
-        return fun_name == name
+        return LispMemory.words(int(frame.read_var("args")), min(numargs, limit))
 
 
 class CFunctions(Enum):
@@ -0,0 +1,112 @@
+import gdb
+from typing import Callable, List, Optional, Tuple
+
+from .lisp_layout import LispLayout
+from .lisp_memory import LispMemory
+
+class LispGC:
+    '''
+    Tracks emacs' garbage collections, so caches keyed by address can
+    outlive a stop
+
+    until a collection runs, nothing reachable moves or gets freed (emacs
+    never moves objects, it only frees and reuses their memory), so anything
+    derived from immutable data stays right. the epoch is gcs_done, read at
+    most once per resume. with lisp-gc-breakpoint on, entering
+    garbage_collect counts too, which also catches stops in the middle of
+    a collection
+    '''
+    listeners: List[Callable[[], None]] = []
+
+    known: Optional[Tuple] = None
+    # LispMemo.generation the epoch was last read in
+    checked: Optional[int] = None
+    # garbage_collect entries seen by the breakpoint
+    collections = 0
+
+    @staticmethod
+    def gcs_done() -> Optional[int]:
+        try:
+            return LispMemory.peek(LispLayout.address("gcs_done"))
+        except (gdb.error, gdb.MemoryError):
+            return None
+
+    @staticmethod
+    def epoch() -> Tuple:
+        if LispGC.checked != LispMemo.generation:
+            LispGC.checked = LispMemo.generation
+            current = (LispGC.gcs_done(), LispGC.collections)
+
+            # nothing to go on: assume every resume collected
+            if current[0] is None and GCBreakpoint.instance is None:
+                current = (None, LispMemo.generation)
+
+            if current != LispGC.known:
+                LispGC.known = current
+                LispGC.collected()
+
+        return LispGC.known
+
+    @staticmethod
+    def collected():
+        for callback in LispGC.listeners:
+            callback()
+
+    @staticmethod
+    def on_collect(callback: Callable[[], None]):
+        LispGC.listeners.append(callback)
+
+    @staticmethod
+    def reset(event=None):
+        LispGC.known = None
+        LispGC.checked = None
+        LispGC.collected()
+
+
+class GCBreakpoint(gdb.Breakpoint):
+    '''
+    Counts collections as they start, without stopping
+    '''
+    instance: Optional["GCBreakpoint"] = None
+
+    def __init__(self):
+        super().__init__("garbage_collect", internal=True)
+
+    def stop(self):
+        LispGC.collections += 1
+        return False
+
+
+class GCBreakpointParameter(gdb.Parameter):
+    '''
+    Whether garbage_collect gets a breakpoint to track GC epochs
+    '''
+    set_doc = "Set whether entering garbage_collect invalidates the Lisp debugger's caches."
+    show_doc = "Show whether entering garbage_collect invalidates the Lisp debugger's caches."
+
+    def __init__(self):
+        super().__init__("lisp-gc-breakpoint", gdb.COMMAND_MAINTENANCE, gdb.PARAM_BOOLEAN)
+        self.value = False
+
+    def get_set_string(self):
+        instance = GCBreakpoint.instance
+
+        if self.value and (instance is None or not instance.is_valid()):
+            GCBreakpoint.instance = GCBreakpoint()
+        elif not self.value and instance is not None:
+            if instance.is_valid():
+                instance.delete()
+
+            GCBreakpoint.instance = None
+
+        return ""
+
+    def get_show_string(self, svalue):
+        return f"Breakpoint on garbage_collect for GC epochs is {svalue}."
+
+
+gdb.events.exited.connect(LispGC.reset)
+LispLayout.on_invalidate(LispGC.reset)
+
+# imported last, since these import this module back
+from .lisp_memo import LispMemo
@@ -0,0 +1,172 @@
+import gdb
+from typing import Callable, Dict, List, Tuple
+
+class LispLayout:
+    '''
+    Session-wide cache of everything we resolve from emacs' debug info
+
+    types, enum constants, field offsets, struct sizes and the addresses of
+    well known globals are looked up the first time they're needed and kept
+    until gdb loads or drops an objfile (the values could have moved)
+    '''
+    types: Dict[object, gdb.Type] = {}
+    constants: Dict[str, int] = {}
+    offsets: Dict[tuple, int] = {}
+    addresses: Dict[str, int] = {}
+    misc: Dict[str, object] = {}
+
+    listeners: List[Callable[[], None]] = []
+
+    @classmethod
+    def type(cls, name: str) -> gdb.Type:
+        if name not in cls.types:
+            cls.types[name] = gdb.lookup_type(name)
+
+        return cls.types[name]
+
+    @classmethod
+    def evaluate(cls, expression: str) -> gdb.Value:
+        '''
+        gdb.parse_and_eval, in one place so lisp-stats can count it
+        '''
+        return gdb.parse_and_eval(expression)
+
+    @classmethod
+    def constant(cls, name: str) -> int:
+        '''
+        value of an enum constant (or DEFINE_GDB_SYMBOL) as an int
+        '''
+        if name not in cls.constants:
+            cls.constants[name] = int(cls.evaluate(name))
+
+        return cls.constants[name]
+
+    @classmethod
+    def sizeof(cls, name: str) -> int:
+        return cls.type(name).sizeof
+
+    @classmethod
+    def offset(cls, type_name: str, path: str) -> int:
+        '''
+        byte offset of a (possibly nested) field, e.g. ("struct Lisp_Cons", "u.s.car")
+        '''
+        key = (type_name, path)
+
+        if key not in cls.offsets:
+            cls.offsets[key], cls.types[key] = cls.walk_fields(type_name, path)
+
+        return cls.offsets[key]
+
+    @classmethod
+    def field_type(cls, type_name: str, path: str) -> gdb.Type:
+        '''
+        declared type of a (possibly nested) field, for layouts that changed
+        between emacs versions
+        '''
+        key = (type_name, path)
+
+        if key not in cls.types:
+            cls.offsets[key], cls.types[key] = cls.walk_fields(type_name, path)
+
+        return cls.types[key]
+
+    @classmethod
+    def walk_fields(cls, type_name: str, path: str) -> Tuple[int, gdb.Type]:
+        typ = cls.type(type_name).strip_typedefs()
+        offset = 0
+        field_type = typ
+
+        for part in path.split("."):
+            field = next((f for f in typ.fields() if f.name == part), None)
+
+            if field is None:
+                raise ValueError(f"{typ} has no field '{part}' (looking for {path})")
+
+            offset += field.bitpos // 8
+            field_type = field.type
+            typ = field.type.strip_typedefs()
+
+        return offset, field_type
+
+    @classmethod
+    def bitfield(cls, type_name: str, path: str) -> Tuple[int, int, int]:
+        '''
+        (byte offset, bit offset within that byte, width) of a bitfield
+        '''
+        key = (type_name, path, "bits")
+
+        if key not in cls.offsets:
+            parent, _, name = path.rpartition(".")
+            typ = cls.type(type_name).strip_typedefs()
+            base = cls.offset(type_name, parent) if parent else 0
+
+            for part in parent.split(".") if parent else []:
+                typ = next(f for f in typ.fields() if f.name == part).type.strip_typedefs()
+
+            field = next((f for f in typ.fields() if f.name == name), None)
+            if field is None:
+                raise ValueError(f"{typ} has no field '{name}' (looking for {path})")
+
+            cls.offsets[key] = (base + field.bitpos // 8, field.bitpos % 8, field.bitsize)
+
+        return cls.offsets[key]
+
+    @classmethod
+    def address(cls, name: str) -> int:
+        '''
+        address of a global in the inferior, e.g. "lispsym" or "globals.f_Vobarray"
+        '''
+        if name not in cls.addresses:
+            ptr = cls.evaluate(f"&{name}")
+            cls.addresses[name] = int(ptr.cast(cls.type("EMACS_UINT")))
+
+        return cls.addresses[name]
+
+    @classmethod
+    def nil_word(cls) -> int:
+        '''
+        the tagged word for Qnil
+
+        Qnil is a macro, so only try it if the macro info is there.
+        otherwise rebuild it: nil is always lispsym[0]
+        '''
+        if "nil_word" not in cls.misc:
+            try:
+                word = LispTags.word(cls.evaluate("Qnil"))
+            except gdb.error:
+                LispTags.load()
+                tag = cls.constant("Lisp_Symbol")
+                word = tag if LispTags.lsb_tag else tag << LispTags.valbits
+
+            cls.misc["nil_word"] = word
+
+        return cls.misc["nil_word"]
+
+    @classmethod
+    def little_endian(cls) -> bool:
+        if "little_endian" not in cls.misc:
+            cls.misc["little_endian"] = "little" in gdb.execute("show endian", to_string=True)
+
+        return cls.misc["little_endian"]
+
+    @classmethod
+    def on_invalidate(cls, callback: Callable[[], None]):
+        cls.listeners.append(callback)
+
+    @classmethod
+    def invalidate(cls, event=None):
+        cls.types.clear()
+        cls.constants.clear()
+        cls.offsets.clear()
+        cls.addresses.clear()
+        cls.misc.clear()
+
+        for callback in cls.listeners:
+            callback()
+
+
+gdb.events.new_objfile.connect(LispLayout.invalidate)
+gdb.events.clear_objfiles.connect(LispLayout.invalidate)
+
+# imported last, since these import this module back
+from .lisp_tags import LispTags
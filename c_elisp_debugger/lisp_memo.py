@@ -0,0 +1,133 @@
+import gdb
+from typing import Callable, Dict, Hashable, Iterator, List
+
+from .lisp_layout import LispLayout
+from .lisp_gc import LispGC
+
+class LispMemo:
+    '''
+    Stop-scoped memo of decoded Lisp values, keyed by raw tagged word
+
+    holds the LispObject wrappers, their printed forms and their children
+    (e.g. the elements of a list) so showing the same frame or form twice in
+    one stop costs nothing, and where paging through a hash table got to. everything goes as soon as the inferior runs,
+    and the whole table is dropped if it outgrows max_entries
+
+    lasting tables are for things derived from immutable objects (symbols,
+    floats, subrs): those stay until a garbage collection could have reused
+    their memory, see LispGC
+    '''
+    max_entries = 100_000
+    max_lasting = 50_000
+
+    generation = 0
+    entries = 0
+
+    tables: Dict[str, Dict[Hashable, object]] = {
+        "objects": {},
+        "printed": {},
+        "children": {},
+        "cursors": {},
+    }
+
+    lasting: Dict[str, Dict[Hashable, object]] = {
+        "printed": {},
+    }
+
+    @staticmethod
+    def get(table: str, key: Hashable, compute: Callable[[], object], lasting: bool = False):
+        if lasting:
+            return LispMemo.get_lasting(table, key, compute)
+
+        entries = LispMemo.tables[table]
+
+        if key in entries:
+            return entries[key]
+
+        value = compute()
+
+        if LispMemo.entries >= LispMemo.max_entries:
+            LispMemo.clear()
+
+        entries[key] = value
+        LispMemo.entries += 1
+
+        return value
+
+    @staticmethod
+    def get_lasting(table: str, key: Hashable, compute: Callable[[], object]):
+        # clears the lasting tables if there's been a collection
+        LispGC.epoch()
+        entries = LispMemo.lasting[table]
+
+        if key in entries:
+            return entries[key]
+
+        value = compute()
+
+        if len(entries) >= LispMemo.max_lasting:
+            entries.clear()
+
+        entries[key] = value
+        return value
+
+    @staticmethod
+    def clear():
+        for entries in LispMemo.tables.values():
+            entries.clear()
+
+        LispMemo.entries = 0
+
+    @staticmethod
+    def flush(event=None):
+        '''
+        new stop generation -- nothing decoded before can be trusted
+        '''
+        LispMemo.generation += 1
+        LispMemo.clear()
+
+    @staticmethod
+    def forget(event=None):
+        '''
+        drops the lasting tables too (collections, memory writes, new processes)
+        '''
+        for entries in LispMemo.lasting.values():
+            entries.clear()
+
+
+class WalkedPrefix:
+    '''
+    The elements of a walk that have been asked for so far
+
+    memoizing this instead of the whole walk keeps it lazy: a consumer that
+    stops early (e.g. a truncated argument list) only decodes what it used,
+    and the next one picks up where the furthest one left off
+    '''
+    __slots__ = ("walk", "seen")
+
+    def __init__(self, walk: Iterator):
+        self.walk = walk
+        self.seen: List[object] = []
+
+    def __iter__(self) -> Iterator:
+        index = 0
+
+        while True:
+            if index == len(self.seen):
+                try:
+                    self.seen.append(next(self.walk))
+                except StopIteration:
+                    return
+
+            yield self.seen[index]
+            index += 1
+
+
+gdb.events.cont.connect(LispMemo.flush)
+gdb.events.memory_changed.connect(LispMemo.flush)
+gdb.events.inferior_call.connect(LispMemo.flush)
+gdb.events.exited.connect(LispMemo.flush)
+LispLayout.on_invalidate(LispMemo.flush)
+gdb.events.memory_changed.connect(LispMemo.forget)
+gdb.events.exited.connect(LispMemo.forget)
+LispGC.on_collect(LispMemo.forget)
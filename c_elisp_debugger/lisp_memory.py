@@ -0,0 +1,163 @@
+import gdb
+import struct
+from typing import Dict, List, Tuple
+
+from .lisp_layout import LispLayout
+
+class LispMemory:
+    '''
+    Raw reads of inferior memory, decoded in python
+
+    everything here works on plain ints (addresses and words) so callers
+    never have to build gdb.Values just to follow a pointer
+
+    reads go through a per-stop cache of whole pages: walking a list or a
+    vector usually touches the same block over and over, and over gdbserver
+    every small read is a round trip. the cache is dropped as soon as the
+    inferior runs again or someone writes to its memory
+    '''
+    page_size = 4096
+    max_pages = 1024
+    # anything bigger than this is read straight through (e.g. buffer text)
+    max_cached_read = 16 * page_size
+
+    pages: Dict[Tuple[int, int], memoryview] = {}
+
+    #MARK: cache
+
+    @staticmethod
+    def page(base: int) -> memoryview:
+        inferior = gdb.selected_inferior()
+        key = (inferior.num, base)
+
+        page = LispMemory.pages.get(key)
+        if page is None:
+            page = memoryview(bytes(LispMemory.read_direct(base, LispMemory.page_size)))
+
+            if len(LispMemory.pages) >= LispMemory.max_pages:
+                LispMemory.pages.clear()
+
+            LispMemory.pages[key] = page
+
+        return page
+
+    @staticmethod
+    def flush(event=None):
+        LispMemory.pages.clear()
+
+    # /cache
+
+    #MARK: reading
+
+    @staticmethod
+    def read_direct(addr: int, length: int) -> memoryview:
+        return memoryview(gdb.selected_inferior().read_memory(addr, length))
+
+    @staticmethod
+    def read(addr: int, length: int) -> memoryview:
+        size = LispMemory.page_size
+        base = addr - addr % size
+        end = addr + length
+
+        if length > LispMemory.max_cached_read:
+            return LispMemory.read_direct(addr, length)
+
+        try:
+            if end <= base + size:
+                return LispMemory.page(base)[addr - base:end - base]
+
+            data = b"".join(LispMemory.page(page) for page in range(base, end, size))
+            return memoryview(data)[addr - base:end - base]
+        except gdb.MemoryError:
+            # the whole page might not be mapped even if our bit is (cores)
+            return LispMemory.read_direct(addr, length)
+
+    @staticmethod
+    def unpack(fmt: str, addr: int) -> tuple:
+        '''
+        decodes straight out of the cached page where possible (no copy)
+        '''
+        length = struct.calcsize(fmt)
+        size = LispMemory.page_size
+        base = addr - addr % size
+
+        if addr + length <= base + size:
+            try:
+                return struct.unpack_from(fmt, LispMemory.page(base), addr - base)
+            except gdb.MemoryError:
+                pass
+
+        return struct.unpack(fmt, LispMemory.read(addr, length))
+
+    # /reading
+
+    #MARK: decoding
+
+    @staticmethod
+    def word_format(count: int = 1, signed: bool = False) -> str:
+        endian = "<" if LispLayout.little_endian() else ">"
+        code = {4: "i", 8: "q"}[LispLayout.sizeof("EMACS_INT")]
+
+        return f"{endian}{count}{code if signed else code.upper()}"
+
+    @staticmethod
+    def word(addr: int, signed: bool = False) -> int:
+        return LispMemory.unpack(LispMemory.word_format(signed=signed), addr)[0]
+
+    @staticmethod
+    def peek(addr: int) -> int:
+        '''
+        single uncached word, for hot checks that only ever need one read
+        '''
+        fmt = LispMemory.word_format()
+        return struct.unpack(fmt, LispMemory.read_direct(addr, struct.calcsize(fmt)))[0]
+
+    @staticmethod
+    def words(addr: int, count: int) -> List[int]:
+        if count <= 0:
+            return []
+
+        return list(LispMemory.unpack(LispMemory.word_format(count), addr))
+
+    @staticmethod
+    def double(addr: int) -> float:
+        endian = "<" if LispLayout.little_endian() else ">"
+        return LispMemory.unpack(f"{endian}d", addr)[0]
+
+    @staticmethod
+    def pointer(addr: int) -> int:
+        return LispMemory.word(addr)
+
+    @staticmethod
+    def c_string(addr: int, limit: int = 256) -> str:
+        '''
+        reads a NUL terminated C string (at most limit bytes)
+        '''
+        data = b""
+
+        while len(data) < limit and b"\0" not in data:
+            # aligned chunks so we never read across into an unmapped page
+            start = addr + len(data)
+            chunk = min(64 - start % 64, limit - len(data))
+            data += bytes(LispMemory.read(start, chunk))
+
+        return data.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+    @staticmethod
+    def lisp_object(word: int) -> gdb.Value:
+        '''
+        turns a raw word back into a Lisp_Object value
+
+        built from bytes so it works whether Lisp_Object is a word or a struct
+        '''
+        fmt = LispMemory.word_format()
+        return gdb.Value(struct.pack(fmt, word), LispLayout.type("Lisp_Object"))
+
+    # /decoding
+
+
+gdb.events.cont.connect(LispMemory.flush)
+gdb.events.memory_changed.connect(LispMemory.flush)
+gdb.events.inferior_call.connect(LispMemory.flush)
+gdb.events.exited.connect(LispMemory.flush)
+LispLayout.on_invalidate(LispMemory.flush)
@@ -0,0 +1,434 @@
+import gdb
+import math
+from typing import Iterator, List, Optional, Set, Tuple
+
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_memory import LispMemory
+from .lisp_memo import LispMemo
+from .internal_text import InternalText
+
+class LispPrinter:
+    '''
+    Renders Lisp objects by walking them in inferior memory
+
+    replaces calling debug_format in the inferior, so printing never resumes
+    the program (and works on a core file). output is prin1-ish, with depth
+    and length caps and cycle detection so bad data can't hang gdb
+
+    with mark_shared, anything reachable twice gets print-circle style
+    labels (#1=(a b) ... #1#). that takes a first pass over the same
+    (capped) structure to find out what's shared before printing
+    '''
+    # vectorlikes printed slot by slot
+    slotted = ("PVEC_NORMAL_VECTOR", "PVEC_COMPILED", "PVEC_CLOSURE", "PVEC_RECORD")
+
+    def __init__(self, max_depth: int = 8, max_length: int = 50, max_string: int = 200,
+                 mark_shared: bool = False):
+        self.max_depth = max_depth
+        self.max_length = max_length
+        self.max_string = max_string
+        self.mark_shared = mark_shared
+
+        # addresses reachable more than once, and the labels handed out so far
+        self.shared: Set[int] = set()
+        self.labels = {}
+
+    def print(self, word: int) -> str:
+        key = (word, self.max_depth, self.max_length, self.max_string, self.mark_shared)
+        return LispMemo.get("printed", key, lambda: self.render_top(word),
+                            lasting=LispPrinter.immutable(word))
+
+    def render_top(self, word: int) -> str:
+        if self.mark_shared:
+            self.shared = self.find_shared(word)
+
+        try:
+            return self.render(word, [])
+        finally:
+            self.shared = set()
+            self.labels = {}
+
+    @staticmethod
+    def immutable(word: int) -> bool:
+        '''
+        whether word's printed form can only change if it gets collected
+        '''
+        tag, pvec = LispTags.classify(word)
+        return tag in ("Lisp_Symbol", "Lisp_Float") or pvec == "PVEC_SUBR"
+
+    def render(self, word: int, ancestors: List[int]) -> str:
+        try:
+            tag, pvec = LispTags.classify(word)
+
+            if tag == "Lisp_Int":
+                return str(LispTags.xfixnum(word))
+            elif tag == "Lisp_Symbol":
+                return self.render_symbol(word)
+            elif tag == "Lisp_String":
+                return self.render_string(word)
+            elif tag == "Lisp_Float":
+                return self.render_float(word)
+            elif tag == "Lisp_Cons":
+                return self.render_cons(word, ancestors)
+            elif tag == "Lisp_Vectorlike":
+                return self.render_vectorlike(word, pvec, ancestors)
+            else:
+                return f"#<unknown 0x{word:x}>"
+        except gdb.MemoryError:
+            return f"#<unreadable 0x{word:x}>"
+
+    #MARK: atoms
+
+    def render_symbol(self, word: int) -> str:
+        name = SymbolNames.name(word)
+        return name if name else "##"
+
+    def render_string(self, word: int) -> str:
+        text, truncated = LispPrinter.string_contents(word, self.max_string)
+        text = text.replace("\\", "\\\\").replace('"', '\\"')
+
+        return f'"{text}..."' if truncated else f'"{text}"'
+
+    def render_float(self, word: int) -> str:
+        addr = LispTags.xpntr(word) + LispLayout.offset("struct Lisp_Float", "u.data")
+        value = LispMemory.double(addr)
+
+        if math.isnan(value):
+            return "0.0e+NaN"
+        elif math.isinf(value):
+            return "1.0e+INF" if value > 0 else "-1.0e+INF"
+
+        return repr(value)
+
+    # /atoms
+
+    #MARK: containers
+
+    def label(self, addr: int) -> Tuple[Optional[str], str]:
+        '''
+        (back reference, label prefix) for a container about to be printed
+        '''
+        if addr not in self.shared:
+            return None, ""
+
+        if addr in self.labels:
+            return f"#{self.labels[addr]}#", ""
+
+        self.labels[addr] = len(self.labels) + 1
+        return None, f"#{self.labels[addr]}="
+
+    def render_cons(self, word: int, ancestors: List[int]) -> str:
+        addr = LispTags.xpntr(word)
+
+        reference, prefix = self.label(addr)
+        if reference:
+            return reference
+        if addr in ancestors:
+            return f"#{ancestors.index(addr)}"
+        if len(ancestors) >= self.max_depth:
+            return f"{prefix}(...)"
+
+        inner = ancestors + [addr]
+        parts = []
+
+        walk = ListWalk(word)
+        for index, (cell, car) in enumerate(walk):
+            if index and LispTags.xpntr(cell) in self.shared:
+                # shared tail: print it dotted, so it gets its own label
+                parts += [".", self.render(cell, inner)]
+                break
+            if index >= self.max_length:
+                parts.append("...")
+                break
+
+            parts.append(self.render(car, inner))
+        else:
+            if walk.cycle is not None:
+                parts.append(f". #{walk.cycle}")
+            elif walk.tail != LispLayout.nil_word():
+                parts += [".", self.render(walk.tail, inner)]
+
+        return f"{prefix}({' '.join(parts)})"
+
+    def find_shared(self, word: int) -> Set[int]:
+        '''
+        addresses of the conses and vectors reachable more than once
+        within the caps
+        '''
+        seen = set()
+        shared = set()
+
+        def visit(word: int, depth: int):
+            tag, pvec = LispTags.classify(word)
+
+            if tag == "Lisp_Cons":
+                for index, (cell, car) in enumerate(ListWalk(word)):
+                    addr = LispTags.xpntr(cell)
+
+                    if addr in seen:
+                        shared.add(addr)
+                        return
+
+                    seen.add(addr)
+                    if depth >= self.max_depth or index >= self.max_length:
+                        return
+
+                    visit(car, depth + 1)
+            elif pvec in LispPrinter.slotted:
+                addr = LispTags.xpntr(word)
+
+                if addr in seen:
+                    shared.add(addr)
+                    return
+
+                seen.add(addr)
+                if depth < self.max_depth:
+                    for slot in self.elements(word, 0, self.max_length):
+                        visit(slot, depth + 1)
+
+        try:
+            visit(word, 0)
+        except (gdb.MemoryError, RecursionError):
+            # whatever we found is still right, the printer copes with the rest
+            pass
+
+        return shared
+
+    def render_vectorlike(self, word: int, pvec: str, ancestors: List[int]) -> str:
+        if pvec == "PVEC_NORMAL_VECTOR":
+            return self.render_slots(word, ancestors, "[", "]")
+        elif pvec in ("PVEC_COMPILED", "PVEC_CLOSURE"):
+            return self.render_slots(word, ancestors, "#[", "]")
+        elif pvec == "PVEC_RECORD":
+            return self.render_slots(word, ancestors, "#s(", ")")
+        elif pvec == "PVEC_SUBR":
+            addr = LispTags.xpntr(word) + LispLayout.offset("struct Lisp_Subr", "symbol_name")
+            return f"#<subr {LispMemory.c_string(LispMemory.pointer(addr))}>"
+        elif pvec == "PVEC_HASH_TABLE":
+            return self.render_hash_table(word, ancestors)
+        elif pvec == "PVEC_BUFFER":
+            name = BufferText(word).name()
+            return "#<killed buffer>" if name is None else f"#<buffer {name}>"
+
+        name = pvec.removeprefix("PVEC_").lower().replace("_", "-")
+        return f"#<{name}>"
+
+    def render_slots(self, word: int, ancestors: List[int], opening: str, closing: str) -> str:
+        addr = LispTags.xpntr(word)
+
+        reference, prefix = self.label(addr)
+        if reference:
+            return reference
+        if addr in ancestors:
+            return f"#{ancestors.index(addr)}"
+        if len(ancestors) >= self.max_depth:
+            return f"{prefix}{opening}...{closing}"
+
+        inner = ancestors + [addr]
+        size = LispPrinter.vector_size(word)
+
+        parts = [self.render(slot, inner) for slot in self.elements(word, 0, self.max_length)]
+        if size > self.max_length:
+            parts.append("...")
+
+        return f"{prefix}{opening}{' '.join(parts)}{closing}"
+
+    def render_hash_table(self, word: int, ancestors: List[int]) -> str:
+        addr = LispTags.xpntr(word)
+        table = HashTable(word)
+
+        # the header alone, however big the table is
+        summary = table.summary()[:-1]
+
+        if addr in ancestors:
+            return f"#{ancestors.index(addr)}"
+        if len(ancestors) >= self.max_depth or table.count == 0:
+            return summary + ")"
+
+        inner = ancestors + [addr]
+        parts = []
+
+        for key, value in table.entries(0, self.max_length):
+            parts += [self.render(key, inner), self.render(value, inner)]
+        if table.count > self.max_length:
+            parts.append("...")
+
+        return f"{summary} data ({' '.join(parts)}))"
+
+    # /containers
+
+    #MARK: paging
+
+    @staticmethod
+    def brackets(word: int) -> Optional[Tuple[str, str]]:
+        '''
+        how a sequence opens and closes, or None if it isn't one we can page
+        '''
+        tag, pvec = LispTags.classify(word)
+
+        if tag == "Lisp_Cons":
+            return "(", ")"
+
+        return { "PVEC_NORMAL_VECTOR": ("[", "]"), "PVEC_COMPILED": ("#[", "]"),
+                 "PVEC_CLOSURE": ("#[", "]"), "PVEC_RECORD": ("#s(", ")") }.get(pvec)
+
+    @staticmethod
+    def elements(word: int, start: int = 0, count: Optional[int] = None,
+                 chunk: int = 1024) -> Iterator[int]:
+        '''
+        element words of a list or vector-like, from start, at most count of them
+
+        lists are walked cell by cell (and stop at a cycle), vectors are
+        read a chunk at a time, so neither is ever read whole
+        '''
+        if LispTags.classify(word)[0] == "Lisp_Cons":
+            for index, (_, car) in enumerate(ListWalk(word)):
+                if count is not None and index >= start + count:
+                    return
+                if index >= start:
+                    yield car
+            return
+
+        size = LispPrinter.vector_size(word)
+        end = size if count is None else min(size, start + count)
+        contents = LispTags.xpntr(word) + LispLayout.offset("struct Lisp_Vector", "contents")
+        word_size = LispLayout.sizeof("Lisp_Object")
+
+        for offset in range(start, end, chunk):
+            yield from LispMemory.words(contents + offset * word_size, min(chunk, end - offset))
+
+    @staticmethod
+    def string_slice(word: int, start: int, count: Optional[int]) -> Tuple[str, bool]:
+        '''
+        characters [start, start + count) of a string, and whether there's more
+        '''
+        # a character is at most MAX_MULTIBYTE_LENGTH (5) bytes
+        limit = None if count is None else (start + count + 1) * 5
+        text, truncated = LispPrinter.string_contents(word, limit)
+        end = len(text) if count is None else start + count
+
+        return text[start:end], truncated or len(text) > end
+
+    # /paging
+
+    #MARK: raw helpers
+
+    @staticmethod
+    def vector_size(word: int) -> int:
+        '''
+        number of Lisp_Object slots in a vector (or pseudovector)
+        '''
+        LispTags.load()
+
+        addr = LispTags.xpntr(word) + LispLayout.offset("struct Lisp_Vector", "header.size")
+        size = LispMemory.word(addr, signed=True)
+
+        if size & LispTags.pseudovector_flag:
+            return size & LispLayout.constant("PSEUDOVECTOR_SIZE_MASK")
+
+        return size
+
+    @staticmethod
+    def string_bytes(word: int, limit: Optional[int]):
+        '''
+        returns (raw bytes, multibyte, truncated) for a Lisp string
+
+        a limit of None reads the whole thing
+        '''
+        addr = LispTags.xpntr(word)
+        size = LispMemory.word(addr + LispLayout.offset("struct Lisp_String", "u.s.size"), signed=True)
+        size_byte = LispMemory.word(addr + LispLayout.offset("struct Lisp_String", "u.s.size_byte"), signed=True)
+        data = LispMemory.pointer(addr + LispLayout.offset("struct Lisp_String", "u.s.data"))
+
+        # negative size_byte means unibyte
+        multibyte = size_byte >= 0
+        nbytes = size_byte if multibyte else size
+
+        if nbytes <= 0:
+            return b"", multibyte, False
+
+        if limit is None or limit >= nbytes:
+            return bytes(LispMemory.read(data, nbytes)), multibyte, False
+
+        return bytes(LispMemory.read(data, limit)), multibyte, True
+
+    @staticmethod
+    def string_contents(word: int, limit: Optional[int] = 200):
+        raw, multibyte, truncated = LispPrinter.string_bytes(word, limit)
+        return InternalText.decode(raw, multibyte), truncated
+
+    # /raw helpers
+
+
+class ListWalk:
+    '''
+    Walks a list's cells in inferior memory, in constant memory
+
+    yields (cell word, car word) once per distinct cell. cycles are caught
+    with Floyd's tortoise and hare: the walk is the tortoise, a second
+    pointer runs ahead two cells for each of its steps, and if they ever
+    meet the list is circular. they meet before the walk has gone all the
+    way round, so it carries on to the last cell before the loop closes
+    and stops there. once it's done, tail is the cdr that ended the list,
+    or cycle is the index the list loops back to
+    '''
+    def __init__(self, word: int):
+        self.word = word
+        self.tail: Optional[int] = None
+        self.cycle: Optional[int] = None
+
+    def cdr(self, cell: int) -> int:
+        return LispMemory.word(LispTags.xpntr(cell) + LispLayout.offset("struct Lisp_Cons", "u.s.u.cdr"))
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        car_offset = LispLayout.offset("struct Lisp_Cons", "u.s.car")
+
+        cell = fast = self.word
+        index = 0
+        # distinct cells, once the hare has caught up
+        end: Optional[int] = None
+
+        while LispTags.classify(cell)[0] == "Lisp_Cons":
+            if index == end:
+                return
+
+            yield cell, LispMemory.word(LispTags.xpntr(cell) + car_offset)
+
+            cell = self.cdr(cell)
+            index += 1
+
+            # None once the hare has reached the end: no cycle
+            for _ in range(2):
+                if fast is not None:
+                    fast = self.cdr(fast) if LispTags.classify(fast)[0] == "Lisp_Cons" else None
+
+            if end is None and fast is not None and fast == cell:
+                self.cycle = self.cycle_start(cell)
+                end = self.cycle + self.cycle_length(cell)
+                fast = None
+
+        self.tail = cell
+
+    def cycle_start(self, meeting: int) -> int:
+        # one pointer from the head and one from where they met, in step:
+        # they meet again where the cycle starts
+        slow, fast, index = self.word, meeting, 0
+
+        while slow != fast:
+            slow, fast, index = self.cdr(slow), self.cdr(fast), index + 1
+
+        return index
+
+    def cycle_length(self, member: int) -> int:
+        cell, length = self.cdr(member), 1
+
+        while cell != member:
+            cell, length = self.cdr(cell), length + 1
+
+        return length
+
+# imported last, since these import this module back
+from .hash_table import HashTable
+from .buffer_text import BufferText
+from .lisp_symbols import SymbolNames
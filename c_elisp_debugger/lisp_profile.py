@@ -0,0 +1,167 @@
+import gdb
+import os
+import signal
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_memory import LispMemory
+from .lisp_symbols import SymbolNames
+from .specpdl import SpecpdlBacktrace
+
+class LispProfiler:
+    '''
+    Sampling profiler for the Lisp running in the inferior
+
+    interrupts the inferior from a timer thread, reads the Lisp stack off
+    the specpdl (one bulk read) and lets it run again. the timer only runs
+    while the inferior does: a SIGINT sent after it stopped for something
+    else would stay pending and interrupt the user's next continue. the
+    signal goes to the pid on gdb's host, so remote targets are refused up
+    front (LispTarget.require_native). nothing here builds
+    gdb.Values or evaluates expressions, and function names are cached for
+    the whole profile: symbols never move, so the worst a symbol freed and
+    reused mid-profile can do is mislabel a few samples
+    '''
+    def __init__(self, frequency: int):
+        self.interval = 1 / frequency
+
+        self.samples: Counter = Counter()
+        self.names: Dict[int, str] = {}
+        self.taken = 0
+        self.reason: Optional[str] = None
+
+        self.interrupted = False
+
+        # whether the inferior is running, and so can be interrupted
+        self.running = False
+        self.timer: Optional[threading.Timer] = None
+        self.lock = threading.Lock()
+
+    def label(self, function: int) -> str:
+        name = self.names.get(function)
+
+        if name is None:
+            name = self.names[function] = self.describe(function)
+
+        return name
+
+    @staticmethod
+    def describe(function: int) -> str:
+        tag, pvec = LispTags.classify(function)
+
+        if tag == "Lisp_Symbol":
+            return SymbolNames.name(function)
+        elif pvec == "PVEC_SUBR":
+            addr = LispTags.xpntr(function)
+            name = LispMemory.pointer(addr + LispLayout.offset("struct Lisp_Subr", "symbol_name"))
+            return LispMemory.c_string(name)
+        elif tag == "Lisp_Cons":
+            return "<lambda>"
+        elif pvec in ("PVEC_COMPILED", "PVEC_CLOSURE"):
+            return "<closure>"
+
+        return f"<{(pvec or tag).lower()}>"
+
+    def sample(self):
+        backtrace = SpecpdlBacktrace()
+
+        # outermost first, the way flame graphs want them
+        stack: Tuple[str, ...] = tuple(self.label(backtrace.frame(level).function)
+                                       for level in reversed(range(len(backtrace))))
+
+        self.samples[stack or ("<no lisp>",)] += 1
+        self.taken += 1
+
+    def resumed(self, event):
+        with self.lock:
+            self.running = True
+            self.timer = threading.Timer(self.interval, self.interrupt, (gdb.selected_inferior().pid,))
+            self.timer.start()
+
+    def interrupt(self, pid: int):
+        # runs on the timer thread, so it can race with a stop
+        with self.lock:
+            if self.running:
+                os.kill(pid, signal.SIGINT)
+                self.running = False
+
+    def cancel(self):
+        with self.lock:
+            self.running = False
+
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+    def stopped(self, event):
+        self.cancel()
+        self.interrupted = isinstance(event, gdb.SignalEvent) and event.stop_signal == "SIGINT"
+
+    def run(self, seconds: float):
+        '''
+        samples until time is up, or the inferior stops or exits by itself
+        '''
+        inferior = gdb.selected_inferior()
+        deadline = time.monotonic() + seconds
+
+        gdb.events.cont.connect(self.resumed)
+        gdb.events.stop.connect(self.stopped)
+        try:
+            while time.monotonic() < deadline:
+                self.interrupted = False
+
+                try:
+                    gdb.execute("continue", to_string=True)
+                finally:
+                    # no stop event if it exited (or continue failed)
+                    self.cancel()
+
+                if inferior.pid == 0:
+                    self.reason = "the inferior exited"
+                    return
+
+                if not self.interrupted:
+                    self.reason = "the inferior stopped (breakpoint or signal)"
+                    return
+
+                self.sample()
+        finally:
+            gdb.events.cont.disconnect(self.resumed)
+            gdb.events.stop.disconnect(self.stopped)
+
+    def collapsed(self) -> str:
+        '''
+        folded stacks, one "outer;inner count" line each (flamegraph.pl, speedscope)
+        '''
+        return "\n".join(f"{';'.join(stack)} {count}"
+                         for stack, count in self.samples.most_common())
+
+
+class ProfileFrequencyParameter(gdb.Parameter):
+    '''
+    How many times a second lisp-profile interrupts the inferior
+    '''
+    set_doc = "Set how many times a second lisp-profile samples the Lisp stack."
+    show_doc = "Show how many times a second lisp-profile samples the Lisp stack."
+
+    instance = None
+
+    def __init__(self):
+        super().__init__("lisp-profile-frequency", gdb.COMMAND_RUNNING, gdb.PARAM_ZUINTEGER)
+        self.value = 50
+
+        ProfileFrequencyParameter.instance = self
+
+    def get_show_string(self, svalue):
+        return f"lisp-profile samples per second: {svalue}"
+
+    @staticmethod
+    def frequency() -> int:
+        if ProfileFrequencyParameter.instance is None:
+            return 50
+
+        return max(1, ProfileFrequencyParameter.instance.value)
@@ -0,0 +1,196 @@
+import gdb
+import functools
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+class LispStats:
+    '''
+    Call counts and cumulative times for the debugger's hot paths
+
+    each probe swaps a function for a timing wrapper in place, and turning
+    instrumentation off puts the originals back, so it costs nothing when
+    it's off. times are inclusive (a command's time includes everything it
+    called). counts are kept in total, per lisp command, and since the
+    inferior last resumed (which covers the stop() calls that led to a stop
+    and everything done while stopped)
+    '''
+    enabled = False
+
+    # name -> (owner, attribute, original, is_command)
+    probes: Dict[str, Tuple[object, str, object, bool]] = {}
+
+    # counter name -> [calls, seconds]
+    totals: Dict[str, List[float]] = {}
+    since_resume: Dict[str, List[float]] = {}
+    commands: Dict[str, Dict[str, List[float]]] = {}
+
+    command: Optional[str] = None
+    resumes = 0
+
+    #MARK: probes
+
+    @staticmethod
+    def probe(name: str, owner: object, attr: str, command: bool = False):
+        '''
+        instruments owner.attr (a module function, method, static or class method)
+        '''
+        LispStats.probes[name] = (owner, attr, vars(owner)[attr], command)
+
+        if LispStats.enabled:
+            LispStats.patch(name)
+
+    @staticmethod
+    def wrap(name: str, fn: Callable, command: bool) -> Callable:
+        @functools.wraps(fn)
+        def probed(*args, **kwargs):
+            outer = LispStats.command
+            if command:
+                LispStats.command = name
+
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                LispStats.record(name, time.perf_counter() - start)
+                LispStats.command = outer
+
+        return probed
+
+    @staticmethod
+    def patch(name: str):
+        owner, attr, original, command = LispStats.probes[name]
+
+        if isinstance(original, (staticmethod, classmethod)):
+            wrapped = type(original)(LispStats.wrap(name, original.__func__, command))
+        else:
+            wrapped = LispStats.wrap(name, original, command)
+
+        setattr(owner, attr, wrapped)
+
+    @staticmethod
+    def unpatch(name: str):
+        owner, attr, original, _ = LispStats.probes[name]
+        setattr(owner, attr, original)
+
+    @staticmethod
+    def enable(enabled: bool):
+        if enabled == LispStats.enabled:
+            return
+
+        LispStats.enabled = enabled
+
+        for name in LispStats.probes:
+            if enabled:
+                LispStats.patch(name)
+            else:
+                LispStats.unpatch(name)
+
+        # gdb's own breakpoint types can't be wrapped, so creations and
+        # deletions are counted from events instead (no times)
+        for event, handler in LispStats.handlers():
+            if enabled:
+                event.connect(handler)
+            else:
+                event.disconnect(handler)
+
+    @staticmethod
+    def handlers():
+        return [(gdb.events.cont, LispStats.resumed),
+                (gdb.events.breakpoint_created, LispStats.created),
+                (gdb.events.breakpoint_deleted, LispStats.deleted)]
+
+    # /probes
+
+    #MARK: counting
+
+    @staticmethod
+    def record(name: str, seconds: float):
+        buckets = [LispStats.totals, LispStats.since_resume]
+
+        if LispStats.command is not None:
+            buckets.append(LispStats.commands.setdefault(LispStats.command, {}))
+
+        for bucket in buckets:
+            entry = bucket.get(name)
+
+            if entry is None:
+                bucket[name] = [1, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+
+    @staticmethod
+    def resumed(event=None):
+        LispStats.resumes += 1
+        LispStats.since_resume = {}
+
+    @staticmethod
+    def created(bp):
+        LispStats.record("breakpoint created", 0.0)
+
+    @staticmethod
+    def deleted(bp):
+        LispStats.record("breakpoint deleted", 0.0)
+
+    @staticmethod
+    def reset():
+        LispStats.totals = {}
+        LispStats.since_resume = {}
+        LispStats.commands = {}
+        LispStats.resumes = 0
+
+    # /counting
+
+    @staticmethod
+    def table(bucket: Dict[str, List[float]], indent: str = "  ") -> str:
+        if not bucket:
+            return f"{indent}(nothing recorded)"
+
+        lines = []
+        for name, (calls, seconds) in sorted(bucket.items(), key=lambda item: -item[1][1]):
+            timing = f"{seconds * 1e3:12.3f} {seconds * 1e6 / calls:12.1f}" if seconds else ""
+            lines.append(f"{indent}{name:<32} {calls:>10} {timing}")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def report(section: Optional[str] = None) -> str:
+        header = f"  {'':<32} {'calls':>10} {'total ms':>12} {'per call us':>12}"
+        parts = [f"instrumentation is {'on' if LispStats.enabled else 'off'}", header]
+
+        if section in (None, "totals"):
+            parts += ["totals", LispStats.table(LispStats.totals)]
+
+        if section in (None, "stop"):
+            parts += [f"since the inferior last resumed ({LispStats.resumes} resumes so far)",
+                      LispStats.table(LispStats.since_resume)]
+
+        if section in (None, "commands"):
+            parts.append("per command")
+
+            if not LispStats.commands:
+                parts.append("  (nothing recorded)")
+
+            for command, bucket in sorted(LispStats.commands.items()):
+                parts += [f"  {command}", LispStats.table(bucket, indent="    ")]
+
+        return "\n".join(parts)
+
+
+class StatsParameter(gdb.Parameter):
+    '''
+    Whether the debugger's hot paths are instrumented for lisp-stats
+    '''
+    set_doc = "Set whether the Lisp debugger's hot paths are instrumented."
+    show_doc = "Show whether the Lisp debugger's hot paths are instrumented."
+
+    def __init__(self):
+        super().__init__("lisp-stats", gdb.COMMAND_MAINTENANCE, gdb.PARAM_BOOLEAN)
+        self.value = LispStats.enabled
+
+    def get_set_string(self):
+        LispStats.enable(self.value)
+        return ""
+
+    def get_show_string(self, svalue):
+        return f"Lisp debugger instrumentation is {svalue}."
@@ -0,0 +1,120 @@
+import gdb
+import struct
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_memory import LispMemory
+from .lisp_gc import LispGC
+from .lisp_printer import LispPrinter
+
+class SymbolNames:
+    '''
+    Maps symbol addresses to their names without touching gdb expressions
+
+    builtin symbols live in the static lispsym array, so they're indexed once
+    with a bulk read of the array (their names are in pure space, so the page
+    cache takes care of those). everything else goes in a small LRU, which
+    lasts until a garbage collection could have reused a symbol's memory
+    '''
+    max_cached = 4096
+
+    builtins: Optional[Dict[int, str]] = None
+    builtin_names: Dict[str, int] = {}
+    builtin_range = range(0)
+
+    others: "OrderedDict[int, str]" = OrderedDict()
+
+    @staticmethod
+    def index_builtins():
+        start = LispLayout.address("lispsym")
+        end = start + LispLayout.evaluate("lispsym").type.sizeof
+
+        stride = LispLayout.sizeof("struct Lisp_Symbol")
+        name_offset = LispLayout.offset("struct Lisp_Symbol", "u.s.name")
+
+        raw = LispMemory.read(start, end - start)
+        fmt = LispMemory.word_format()
+
+        builtins = {}
+        for addr in range(start, end, stride):
+            name_word, = struct.unpack_from(fmt, raw, addr - start + name_offset)
+
+            try:
+                builtins[addr], _ = LispPrinter.string_contents(name_word, limit=1024)
+            except gdb.MemoryError:
+                pass
+
+        SymbolNames.builtins = builtins
+        SymbolNames.builtin_names = { name: addr for addr, name in builtins.items() }
+        SymbolNames.builtin_range = range(start, end)
+
+    @staticmethod
+    def name_at(addr: int, remember: bool = True) -> str:
+        '''
+        name of the struct Lisp_Symbol at addr
+
+        pass remember=False for bulk walks that would just flush the LRU
+        '''
+        if SymbolNames.builtins is None:
+            SymbolNames.index_builtins()
+
+        if addr in SymbolNames.builtin_range:
+            name = SymbolNames.builtins.get(addr)
+            if name is not None:
+                return name
+
+        LispGC.epoch()
+
+        others = SymbolNames.others
+        if addr in others:
+            others.move_to_end(addr)
+            return others[addr]
+
+        name_word = LispMemory.word(addr + LispLayout.offset("struct Lisp_Symbol", "u.s.name"))
+        name, _ = LispPrinter.string_contents(name_word, limit=1024)
+
+        if not remember:
+            return name
+
+        others[addr] = name
+        if len(others) > SymbolNames.max_cached:
+            others.popitem(last=False)
+
+        return name
+
+    @staticmethod
+    def builtin(name: str) -> Optional[int]:
+        '''
+        tagged word of a builtin symbol by name (Qt, Qunbound, ...)
+        '''
+        if SymbolNames.builtins is None:
+            SymbolNames.index_builtins()
+
+        addr = SymbolNames.builtin_names.get(name)
+        return LispTags.make_symbol(addr) if addr is not None else None
+
+    @staticmethod
+    def name(word: int) -> str:
+        '''
+        name of a tagged symbol
+        '''
+        return SymbolNames.name_at(LispTags.xsymbol(word))
+
+    @staticmethod
+    def flush_others(event=None):
+        # non-builtins can be collected and their memory reused
+        SymbolNames.others.clear()
+
+    @staticmethod
+    def reset():
+        SymbolNames.builtins = None
+        SymbolNames.builtin_names = {}
+        SymbolNames.builtin_range = range(0)
+        SymbolNames.flush_others()
+
+
+gdb.events.exited.connect(SymbolNames.reset)
+LispLayout.on_invalidate(SymbolNames.reset)
+LispGC.on_collect(SymbolNames.flush_others)
@@ -0,0 +1,176 @@
+import gdb
+from typing import Optional, Tuple
+
+from .lisp_layout import LispLayout
+from .lisp_memory import LispMemory
+
+class LispTags:
+    '''
+    Classifies tagged Lisp_Object words with plain integer arithmetic
+
+    all the constants (tag values, VALMASK, pseudovector header layout) are
+    read out of the inferior once, then every object just needs some masking
+    (and one header read for vectorlikes)
+    '''
+    loaded = False
+
+    @classmethod
+    def reset(cls):
+        cls.loaded = False
+
+    @classmethod
+    def load(cls):
+        if cls.loaded:
+            return
+
+        word_type = LispLayout.type("EMACS_UINT")
+        word_bits = word_type.sizeof * 8
+
+        cls.word_type = word_type
+        cls.word_mask = (1 << word_bits) - 1
+        cls.gctypebits = LispLayout.constant("GCTYPEBITS")
+        cls.valbits = word_bits - cls.gctypebits
+        cls.valmask = LispLayout.constant("VALMASK") & cls.word_mask
+        cls.lsb_tag = bool(LispLayout.constant("USE_LSB_TAG"))
+
+        cls.tags = {}
+        for name in ["Lisp_Symbol", "Lisp_Int0", "Lisp_Int1", "Lisp_String",
+                     "Lisp_Vectorlike", "Lisp_Cons", "Lisp_Float"]:
+            # both fixnum tags mean the same thing to us
+            tag = "Lisp_Int" if name.startswith("Lisp_Int") else name
+            cls.tags[LispLayout.constant(name)] = tag
+
+        cls.pseudovector_flag = LispLayout.constant("PSEUDOVECTOR_FLAG")
+        cls.pvec_type_mask = LispLayout.constant("PVEC_TYPE_MASK")
+        cls.pvec_area_bits = LispLayout.constant("PSEUDOVECTOR_AREA_BITS")
+        cls.pvec_types = { field.enumval: field.name
+                           for field in LispLayout.type("enum pvec_type").fields() }
+
+        cls.loaded = True
+
+    @classmethod
+    def word(cls, obj: gdb.Value) -> int:
+        '''
+        the tagged word behind a Lisp_Object as a python int
+
+        handles both the plain word and the --enable-check-lisp-object-type struct
+        '''
+        cls.load()
+
+        typ = obj.type.strip_typedefs()
+        if typ.code in (gdb.TYPE_CODE_STRUCT, gdb.TYPE_CODE_UNION):
+            obj = obj[typ.fields()[0]]
+
+        return int(obj.cast(cls.word_type)) & cls.word_mask
+
+    @classmethod
+    def xtype(cls, word: int) -> int:
+        cls.load()
+
+        if cls.lsb_tag:
+            return word & ~cls.valmask & cls.word_mask
+        else:
+            return word >> cls.valbits
+
+    @classmethod
+    def xpntr(cls, word: int) -> int:
+        cls.load()
+        return word & cls.valmask
+
+    @classmethod
+    def xfixnum(cls, word: int) -> int:
+        cls.load()
+
+        inttypebits = cls.gctypebits - 1
+        bits = cls.word_mask.bit_length()
+
+        if not cls.lsb_tag:
+            # the tag is at the top, so shift it out first
+            word = (word << inttypebits) & cls.word_mask
+
+        if word >> (bits - 1):
+            word -= 1 << bits
+
+        return word >> inttypebits
+
+    @classmethod
+    def xsymbol(cls, word: int) -> int:
+        '''
+        address of the struct Lisp_Symbol
+
+        symbols are stored as offsets from lispsym rather than real pointers
+        '''
+        return LispLayout.address("lispsym") + cls.xpntr(word)
+
+    @classmethod
+    def make_symbol(cls, addr: int) -> int:
+        '''
+        the tagged word for the struct Lisp_Symbol at addr (inverse of xsymbol)
+        '''
+        cls.load()
+
+        tag = LispLayout.constant("Lisp_Symbol")
+        offset = addr - LispLayout.address("lispsym")
+
+        return offset + (tag if cls.lsb_tag else tag << cls.valbits)
+
+    @classmethod
+    def make_fixnum(cls, n: int) -> int:
+        cls.load()
+
+        inttypebits = cls.gctypebits - 1
+        int0 = LispLayout.constant("Lisp_Int0")
+
+        if cls.lsb_tag:
+            return ((n << inttypebits) + int0) & cls.word_mask
+
+        bits = cls.word_mask.bit_length() - inttypebits
+        return ((int0 << cls.valbits) + (n & ((1 << bits) - 1))) & cls.word_mask
+
+    @classmethod
+    def make_ptr(cls, addr: int, type_code: str) -> int:
+        '''
+        tags a pointer, like make_lisp_ptr does in C
+        '''
+        if type_code == "Lisp_Symbol":
+            return cls.make_symbol(addr)
+
+        cls.load()
+        tag = LispLayout.constant(type_code)
+
+        return addr + (tag if cls.lsb_tag else tag << cls.valbits)
+
+    @classmethod
+    def pvec_type(cls, word: int) -> str:
+        '''
+        reads the vectorlike header and decodes the pseudovector type
+
+        plain vectors have no PVEC code in their header, so we report them as
+        PVEC_NORMAL_VECTOR (which is what emacs does too)
+        '''
+        header = cls.xpntr(word) + LispLayout.offset("struct Lisp_Vector", "header.size")
+        size = LispMemory.word(header, signed=True)
+
+        if not size & cls.pseudovector_flag:
+            return "PVEC_NORMAL_VECTOR"
+
+        code = (size & cls.pvec_type_mask) >> cls.pvec_area_bits
+        return cls.pvec_types.get(code, "PVEC_UNKNOWN")
+
+    @classmethod
+    def classify(cls, word: int) -> Tuple[Optional[str], Optional[str]]:
+        '''
+        returns (tag name, pvec type name)
+
+        the pvec type is only filled in for vectorlikes
+        '''
+        cls.load()
+        tag = cls.tags.get(cls.xtype(word))
+
+        if tag == "Lisp_Vectorlike":
+            return tag, cls.pvec_type(word)
+
+        return tag, None
+
+
+LispLayout.on_invalidate(LispTags.reset)
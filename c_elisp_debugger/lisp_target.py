@@ -0,0 +1,51 @@
+import gdb
+
+class LispTarget:
+    '''
+    What we're attached to: a live emacs or a core file, run natively or
+    through gdbserver
+
+    on a core nothing can run in the inferior, so anything that would need
+    to (navigation, breakpoints) checks here first and says so up front,
+    instead of gdb erroring out halfway through. the profiler signals the
+    inferior's pid itself, which is only ours when it runs natively
+    '''
+    @staticmethod
+    def post_mortem() -> bool:
+        inferior = gdb.selected_inferior()
+        connection = getattr(inferior, "connection", None)
+
+        if connection is not None:
+            return connection.type == "core"
+
+        # older gdbs don't have connections
+        return "core file" in gdb.execute("info target", to_string=True)
+
+    @staticmethod
+    def require_live(feature: str) -> bool:
+        if LispTarget.post_mortem():
+            print(f"{feature} needs a live process (post-mortem mode: debugging a core file)")
+            return False
+
+        return True
+
+    @staticmethod
+    def native() -> bool:
+        inferior = gdb.selected_inferior()
+        connection = getattr(inferior, "connection", None)
+
+        if connection is not None:
+            return connection.type == "native"
+
+        return "remote" not in gdb.execute("info target", to_string=True)
+
+    @staticmethod
+    def require_native(feature: str) -> bool:
+        if not LispTarget.require_live(feature):
+            return False
+
+        if not LispTarget.native():
+            print(f"{feature} needs a process run by gdb itself, not through gdbserver or a remote target")
+            return False
+
+        return True
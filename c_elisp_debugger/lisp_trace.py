@@ -0,0 +1,227 @@
+import gdb
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .lisp_tags import LispTags
+from .lisp_printer import LispPrinter
+from .breakpoints import LispBreakpoint
+from .trace_log import TraceLog, TraceWriter
+
+class ReturnSite(gdb.Breakpoint):
+    '''
+    A persistent breakpoint on a return address traced calls come back to
+
+    shared by every trace, and never stops: a hit hands the caller's sp and
+    the return value to each trace, which matches it against the calls it
+    has outstanding. there's one per call site rather than one finish
+    breakpoint per call, since gdb doesn't allow creating breakpoints from
+    a stop() (sites are only ever made from the stop event, see LispTrace)
+    '''
+    sites: Dict[int, Optional["ReturnSite"]] = {}
+    # return addresses seen in a stop(), waiting for a breakpoint
+    wanted: Set[int] = set()
+
+    # where a function's return value is right after it returns
+    return_registers = {
+        "i386:x86-64": "rax",
+        "i386": "eax",
+        "aarch64": "x0",
+        "arm": "r0",
+        "riscv": "a0",
+    }
+
+    def __init__(self, pc: int):
+        super().__init__(f"*0x{pc:x}", internal=True)
+        self.pc = pc
+
+    def stop(self):
+        frame = gdb.newest_frame()
+        sp = int(frame.read_register("sp"))
+        word = ReturnSite.return_word(frame)
+
+        for trace in LispTrace.traces.values():
+            trace.returned(sp, word)
+
+        return False
+
+    @staticmethod
+    def return_word(frame: gdb.Frame) -> Optional[int]:
+        arch = frame.architecture().name()
+
+        for prefix, register in ReturnSite.return_registers.items():
+            if arch.startswith(prefix):
+                return LispTags.word(frame.read_register(register))
+
+        return None
+
+    @staticmethod
+    def covers(pc: int) -> bool:
+        '''
+        whether returns to pc are (or can't be) caught. if not, it's queued
+        for the next stop event
+        '''
+        if pc in ReturnSite.sites:
+            return True
+
+        ReturnSite.wanted.add(pc)
+        return False
+
+    @staticmethod
+    def create_wanted():
+        for pc in ReturnSite.wanted:
+            try:
+                ReturnSite.sites[pc] = ReturnSite(pc)
+            except gdb.error:
+                # returns there show up as unwinds instead
+                ReturnSite.sites[pc] = None
+
+        ReturnSite.wanted = set()
+
+    @staticmethod
+    def delete_all():
+        for site in ReturnSite.sites.values():
+            if site is not None and site.is_valid():
+                site.delete()
+
+        ReturnSite.sites = {}
+        ReturnSite.wanted = set()
+
+
+class LispTrace:
+    '''
+    Logs every call to a Lisp function (and what it returned) to a trace log
+
+    a LispBreakpoint with a tracer never stops: its dispatcher hands the hit
+    over to called(), which writes a record and queues the call against
+    its caller's return address and sp, for a ReturnSite to match when it
+    returns. stop() can't create breakpoints, so the first call from a
+    return address with no ReturnSite yet stops the inferior once: the stop
+    event creates the site and resumes it with a continue (gdb reports that
+    stop, and a step that runs into one carries on as a continue)
+
+    depth is the nesting of traced calls, like trace.el's
+    '''
+    max_args = 16
+
+    traces: Dict[str, "LispTrace"] = {}
+
+    def __init__(self, func_name: str, path: str):
+        self.func_name = func_name
+        self.path = path
+
+        self.writer = TraceWriter(path)
+        self.started = time.perf_counter_ns()
+        self.calls = 0
+
+        # outstanding calls as (call, depth, caller's sp), innermost last
+        self.pending: List[Tuple[int, int, int]] = []
+
+        self.printer = LispPrinter(max_depth=3, max_length=10, max_string=80)
+        self.breakpoints = LispBreakpoint.create(func_name, tracer=self)
+
+        LispTrace.traces[func_name] = self
+
+    def now(self) -> int:
+        return time.perf_counter_ns() - self.started
+
+    def called(self, bp: LispBreakpoint) -> bool:
+        '''
+        records a call, from the dispatcher's stop(). returns whether the
+        inferior has to stop so its return can be caught
+        '''
+        caller = gdb.newest_frame().older()
+        sp = None if caller is None else int(caller.read_register("sp"))
+
+        # anything outstanding at or below our caller on the C stack is
+        # gone without returning (throw, signal)
+        if sp is not None:
+            self.unwind(lambda pending_sp: pending_sp <= sp)
+
+        self.calls += 1
+        depth = len(self.pending) + 1
+
+        args = [self.printer.print(word) for word in bp.func_class.current_args(LispTrace.max_args)]
+        self.writer.write(TraceLog.CALL, self.now(), self.calls, depth, [self.func_name] + args)
+
+        # nothing to return to (outermost frame)
+        if sp is None:
+            return False
+
+        self.pending.append((self.calls, depth, sp))
+        return not ReturnSite.covers(caller.pc())
+
+    def returned(self, sp: int, word: Optional[int]):
+        # calls made further down the stack never came back
+        self.unwind(lambda pending_sp: pending_sp < sp)
+
+        if self.pending and self.pending[-1][2] == sp:
+            call, depth, _ = self.pending.pop()
+            value = self.printer.print(word) if word is not None else "?"
+            self.writer.write(TraceLog.RETURN, self.now(), call, depth, [self.func_name, value])
+
+    def unwind(self, gone: Callable[[int], bool]):
+        while self.pending and gone(self.pending[-1][2]):
+            call, depth, _ = self.pending.pop()
+            self.writer.write(TraceLog.UNWIND, self.now(), call, depth, [self.func_name])
+
+    def stop(self):
+        for bp in self.breakpoints:
+            bp.delete()
+
+        self.pending = []
+
+        self.writer.close()
+        LispTrace.traces.pop(self.func_name, None)
+
+        if not LispTrace.traces:
+            ReturnSite.delete_all()
+
+    def __str__(self):
+        return f"{self.func_name} -> {self.path} ({self.calls} calls)"
+
+    @staticmethod
+    def flush(event=None):
+        '''
+        keeps the logs readable whenever the inferior stops or exits
+        '''
+        for trace in LispTrace.traces.values():
+            trace.writer.flush()
+
+    @staticmethod
+    def exited(event=None):
+        '''
+        nothing outstanding survives the process, and a new one may load
+        at a different address
+        '''
+        for trace in LispTrace.traces.values():
+            trace.unwind(lambda pending_sp: True)
+
+        ReturnSite.delete_all()
+
+    @staticmethod
+    def stopped(event):
+        '''
+        creates the return sites stop()s asked for, and resumes if that's
+        all the inferior stopped for
+        '''
+        if not ReturnSite.wanted:
+            return
+
+        ReturnSite.create_wanted()
+
+        if LispTrace.interim(event):
+            gdb.post_event(lambda: gdb.execute("continue"))
+
+    @staticmethod
+    def interim(event) -> bool:
+        '''
+        whether event is a stop only made so a trace could create a ReturnSite
+        '''
+        return (isinstance(event, gdb.BreakpointEvent)
+                and all(getattr(bp, "tracing_stop", False) for bp in event.breakpoints))
+
+
+gdb.events.stop.connect(LispTrace.stopped)
+gdb.events.stop.connect(LispTrace.flush)
+gdb.events.exited.connect(LispTrace.flush)
+gdb.events.exited.connect(LispTrace.exited)
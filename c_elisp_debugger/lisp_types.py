@@ -0,0 +1,457 @@
+import gdb
+from typing import Dict, List, Optional, Union, Generator
+
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_memory import LispMemory
+from .lisp_memo import LispMemo, WalkedPrefix
+from .lisp_printer import LispPrinter
+from .hash_table import HashTable
+from .buffer_text import BufferText
+from .lisp_symbols import SymbolNames
+
+class LispObject:
+    '''
+    A Lisp object, held as a plain int
+
+    tagged objects keep their Lisp_Object word, untagged ones the address of
+    their struct (or the value, for fixnums). the gdb.Value is only built
+    when something asks for .object, so walking thousands of objects doesn't
+    make thousands of values. nil, t and small fixnums are flyweights
+    '''
+    __slots__ = ("raw", "tagged", "value")
+
+    # the struct untagged objects point to, looked up when first needed
+    struct_name: Optional[str] = None
+
+    # fixnums that get shared wrappers
+    flyweight_range = range(-128, 1024)
+    flyweights: Dict[int, "LispObject"] = {}
+    # word of t, looked up with the first flyweight
+    t_word: Optional[int] = None
+
+    def __init__(self, obj: Union[gdb.Value, int], tagged: bool):
+        self.tagged = tagged
+        self.value: Optional[gdb.Value] = None
+
+        if isinstance(obj, gdb.Value):
+            assert self.claims(obj, tagged)
+            self.value = obj
+            obj = self.to_raw(obj, tagged)
+        else:
+            assert not tagged or self.claims_word(obj)
+
+        self.raw = obj
+
+    def to_raw(self, obj: gdb.Value, tagged: bool) -> int:
+        if tagged:
+            return LispTags.word(obj)
+
+        return int(obj.cast(LispLayout.type("EMACS_UINT")))
+
+    @property
+    def object(self) -> gdb.Value:
+        if self.value is None:
+            self.value = self.from_raw()
+
+        return self.value
+
+    def from_raw(self) -> gdb.Value:
+        if self.tagged:
+            return LispMemory.lisp_object(self.raw)
+
+        return gdb.Value(self.raw).cast(LispLayout.type("EMACS_UINT")).cast(self.lisp_type())
+
+    @classmethod
+    def lisp_type(cls) -> gdb.Type:
+        return LispLayout.type(cls.struct_name).pointer()
+
+    @property
+    def word(self) -> int:
+        assert self.tagged
+        return self.raw
+
+    @property
+    def object_address(self):
+        '''
+        the word (or address) as hex, to paste into gdb expressions
+        '''
+        LispTags.load()
+        return f"0x{self.raw & LispTags.word_mask:x}"
+
+    def nilp(self) -> bool:
+        if self.tagged:
+            return self.raw == LispLayout.nil_word()
+        else:
+            # nil is always the first builtin symbol
+            return self.raw == LispLayout.address("lispsym")
+
+    def tagging_allowed(self) -> bool:
+        if self.tagged:
+            return True
+        else:
+            # FIXNUM_OVERFLOW_P, without needing the macro
+            LispTags.load()
+            most_positive = (1 << LispTags.valbits) - 1
+            return not (-most_positive - 1 <= self.raw <= most_positive)
+
+
+    def tag_untagged(self) -> int:
+        assert not self.tagged
+        return LispTags.make_ptr(self.raw, self.type_code)
+
+    def tag(self):
+        assert self.tagging_allowed()
+        word = self.raw if self.tagged else self.tag_untagged()
+
+        return LispObject.from_word(word)
+
+    def untag_tagged(self) -> int:
+        assert self.tagged
+
+        if self.decoded_as == "Lisp_Symbol":
+            return LispTags.xsymbol(self.raw)
+        else:
+            return LispTags.xpntr(self.raw)
+
+    def untag(self):
+        raw = self.untag_tagged() if self.tagged else self.raw
+        return self.__class__(raw, False)
+
+    def __eq__(self, other) -> bool:
+        assert isinstance(other, LispObject)
+
+        return self.untag().raw == other.untag().raw
+
+    def untagged_str(self) -> str:
+        # a pointer to the struct prints the same as the object it points to
+        return LispPrinter().print(self.tag_untagged())
+
+    def __str__(self) -> str:
+        if self.tagged:
+            return LispPrinter().print(self.raw)
+        else:
+            return self.untagged_str()
+
+    @staticmethod
+    def is_tagged(obj: gdb.Value) -> bool:
+        return obj.type == LispLayout.type("Lisp_Object")
+
+    @classmethod
+    def claims(cls, obj: gdb.Value, tagged: bool) -> bool:
+        if tagged:
+            return cls.claims_word(LispTags.word(obj))
+        else:
+            return obj.type == cls.lisp_type()
+
+    @classmethod
+    def claims_word(cls, word: int) -> bool:
+        tag, pvec = LispTags.classify(word)
+        return cls.decoded_as in (tag, pvec)
+
+    @staticmethod
+    def create(obj: Union[gdb.Value, int]):
+        if isinstance(obj, int):
+            return LispObject.from_word(obj)
+        if LispObject.is_tagged(obj):
+            return LispObject.from_word(LispTags.word(obj))
+
+        return LispObject.decode(obj)
+
+    @staticmethod
+    def from_word(word: int):
+        '''
+        wrapper for a tagged word, without going through a gdb.Value
+        '''
+        flyweight = LispObject.flyweights.get(word)
+        if flyweight is not None:
+            return flyweight
+
+        if LispObject.shareable(word):
+            obj = LispObject.flyweights[word] = LispObject.decode_word(word)
+            return obj
+
+        # wrappers are immutable, so one per word is plenty within a stop
+        return LispMemo.get("objects", word, lambda: LispObject.decode_word(word))
+
+    @staticmethod
+    def shareable(word: int) -> bool:
+        tag, _ = LispTags.classify(word)
+
+        if tag == "Lisp_Int":
+            return LispTags.xfixnum(word) in LispObject.flyweight_range
+
+        if LispObject.t_word is None:
+            LispObject.t_word = SymbolNames.builtin("t")
+
+        return word == LispLayout.nil_word() or word == LispObject.t_word
+
+    @staticmethod
+    def reset_flyweights(event=None):
+        LispObject.flyweights.clear()
+        LispObject.t_word = None
+
+    valid_types: List[type] = []
+
+    @staticmethod
+    def types() -> List[type]:
+        if not LispObject.valid_types:
+            LispObject.valid_types = [
+                LispSymbol,
+                LispInteger,
+                LispCons,
+                LispFloat,
+                LispString,
+                LispVector,
+                LispSubr,
+                LispHashTable,
+                LispBuffer,
+            ]
+
+        return LispObject.valid_types
+
+    @staticmethod
+    def decode_word(word: int):
+        tag, pvec = LispTags.classify(word)
+        decoded = { lisp_type.decoded_as: lisp_type for lisp_type in LispObject.types() }
+
+        #vectorlike is a weird edge case
+        if pvec is not None:
+            lisp_type = decoded.get(pvec, LispVectorlike)
+        else:
+            lisp_type = decoded.get(tag)
+
+        if lisp_type is not None:
+            return lisp_type(word, True)
+
+        print("i dunno what this is :(")
+        print(tag)
+
+    @staticmethod
+    def decode(obj: gdb.Value):
+        if LispObject.is_tagged(obj):
+            return LispObject.decode_word(LispTags.word(obj))
+
+        for lisp_type in LispObject.types():
+            if lisp_type.claims(obj, False):
+                return lisp_type(obj, False)
+
+        print("i dunno what this is :(")
+        print(obj.type)
+
+    @staticmethod
+    def from_var(name: str, frame: Optional[gdb.Frame] = None):
+        if frame is not None:
+            return LispObject.create(frame.read_var(name))
+
+        obj, _ = gdb.lookup_symbol(name)
+
+        if obj is None:
+            # using value error to match behaviour of frame.read_var
+            raise ValueError(f"Variable '{name}' not found")
+
+        if obj.needs_frame:
+            return LispObject.create(obj.value(gdb.selected_frame()))
+        else:
+            return LispObject.create(obj.value())
+
+    @staticmethod
+    def raw_object(obj: gdb.Value):
+        '''
+        a value (pointer or Lisp_Object) as hex, without format_string
+        '''
+        if LispObject.is_tagged(obj):
+            return f"0x{LispTags.word(obj):x}"
+
+        return f"0x{int(obj.cast(LispLayout.type('EMACS_UINT'))):x}"
+
+class LispSymbol(LispObject):
+    __slots__ = ()
+    type_code = "Lisp_Symbol"
+    decoded_as = "Lisp_Symbol"
+    struct_name = "struct Lisp_Symbol"
+
+    def contents(self):
+        if self.nilp():
+            return []
+        raise NotImplementedError("haven't made contents for general symbols yet")
+
+    def name(self) -> str:
+        if self.tagged:
+            return SymbolNames.name(self.raw)
+        else:
+            return SymbolNames.name_at(self.raw)
+
+    def untagged_str(self) -> str:
+        return self.name()
+
+class LispInteger(LispObject):
+    __slots__ = ()
+    decoded_as = "Lisp_Int"
+
+    def to_raw(self, obj: gdb.Value, tagged: bool) -> int:
+        # untagged, the raw int is the value itself
+        return super().to_raw(obj, tagged) if tagged else int(obj)
+
+    def from_raw(self) -> gdb.Value:
+        if self.tagged:
+            return super().from_raw()
+
+        return gdb.Value(self.raw).cast(LispLayout.type("EMACS_INT"))
+
+    def tag_untagged(self) -> int:
+        raise NotImplementedError()
+
+    def untag_tagged(self) -> int:
+        assert self.tagged
+        return LispTags.xfixnum(self.raw)
+
+    @classmethod
+    def claims(cls, obj: gdb.Value, tagged: bool) -> bool:
+        if tagged:
+            return super().claims(obj, tagged)
+        else:
+            return obj.type == LispLayout.type("EMACS_INT")
+
+    def untagged_str(self) -> str:
+        return str(self.raw)
+
+class LispCons(LispObject):
+    __slots__ = ()
+    type_code = "Lisp_Cons"
+    decoded_as = "Lisp_Cons"
+    struct_name = "struct Lisp_Cons"
+
+    def field(self, path) -> int:
+        cons = LispTags.xpntr(self.raw) if self.tagged else self.raw
+
+        addr = cons + LispLayout.offset("struct Lisp_Cons", path)
+        return LispMemory.word(addr)
+
+    def car(self) -> LispObject:
+        return LispObject.from_word(self.field("u.s.car"))
+
+    def cdr(self) -> LispObject:
+        return LispObject.from_word(self.field("u.s.u.cdr"))
+
+    # contents never hands back more than this many elements by default
+    max_contents = 10_000
+
+    def contents(self, limit: Optional[int] = None) -> Generator[LispObject, None, None]:
+        limit = LispCons.max_contents if limit is None else limit
+
+        if self.tagged:
+            yield from LispMemo.get("children", (self.raw, limit),
+                                    lambda: WalkedPrefix(self.walk(limit)))
+        else:
+            yield from self.walk(limit)
+
+    def walk(self, limit: int) -> Generator[LispObject, None, None]:
+        '''
+        the elements, stopping at limit, a dotted tail or a cycle
+        '''
+        word = self.raw if self.tagged else self.tag_untagged()
+
+        for car in LispPrinter.elements(word, 0, limit):
+            yield LispObject.from_word(car)
+
+class LispFloat(LispObject):
+    __slots__ = ()
+    type_code = "Lisp_Float"
+    decoded_as = "Lisp_Float"
+    struct_name = "struct Lisp_Float"
+
+class LispString(LispObject):
+    __slots__ = ()
+    type_code = "Lisp_String"
+    decoded_as = "Lisp_String"
+    struct_name = "struct Lisp_String"
+
+#vectorlike encodes a bunch of different types in the source
+#extract these out and make them inherit from LispObject as needed
+class LispVectorlike(LispObject):
+    __slots__ = ()
+    type_code = "Lisp_Vectorlike"
+    decoded_as = "Lisp_Vectorlike"
+
+    def __init__(self, obj: Union[gdb.Value, int], tagged: bool):
+        assert tagged
+        super().__init__(obj, tagged)
+
+
+#necessary vectorlikes
+class LispVector(LispObject):
+    __slots__ = ()
+    type_code = LispVectorlike.type_code
+    decoded_as = "PVEC_NORMAL_VECTOR"
+    struct_name = "struct Lisp_Vector"
+
+
+class LispSubr(LispObject):
+    __slots__ = ()
+    type_code = LispVectorlike.type_code
+    decoded_as = "PVEC_SUBR"
+    struct_name = "struct Lisp_Subr"
+
+    @property
+    def subr(self):
+        return self.untag().object.dereference()
+
+    def name(self) -> str:
+        return self.subr["symbol_name"].string()
+
+    def num_args(self) -> Union[range, str]:
+        subr = self.subr
+
+        max_args = subr["max_args"]
+        if max_args == LispLayout.constant("UNEVALLED"):
+            return LispLayout.constant("UNEVALLED")
+        elif max_args == LispLayout.constant("MANY"):
+            return LispLayout.constant("MANY")
+
+        min_args = subr["min_args"]
+        return range(min_args, max_args)
+
+    def function(self):
+        subr = self.subr
+        max_args = subr["max_args"]
+
+        if max_args == LispLayout.constant("UNEVALLED"):
+            return subr["function"]["aUNEVALLED"]
+        elif max_args == LispLayout.constant("MANY"):
+            return subr["function"]["aMANY"]
+        else:
+            return subr["function"][f"a{max_args}"]
+
+    def untagged_str(self) -> str:
+        return self.name()
+
+
+class LispHashTable(LispObject):
+    __slots__ = ()
+    type_code = LispVectorlike.type_code
+    decoded_as = "PVEC_HASH_TABLE"
+    struct_name = "struct Lisp_Hash_Table"
+
+    def table(self) -> HashTable:
+        return HashTable(self.raw if self.tagged else self.tag_untagged())
+
+    def get(self, key: int) -> Optional[int]:
+        return self.table().get(key)
+
+
+class LispBuffer(LispObject):
+    __slots__ = ()
+    type_code = LispVectorlike.type_code
+    decoded_as = "PVEC_BUFFER"
+    struct_name = "struct buffer"
+
+    def buffer_text(self) -> BufferText:
+        return BufferText(self.raw if self.tagged else self.tag_untagged())
+
+    def text(self, start: Optional[int] = None, end: Optional[int] = None) -> str:
+        return self.buffer_text().text(start, end)
+
+
+gdb.events.exited.connect(LispObject.reset_flyweights)
+LispLayout.on_invalidate(LispObject.reset_flyweights)
@@ -0,0 +1,215 @@
+import gdb
+from typing import Dict, List, Optional
+
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_printer import LispPrinter
+from .lisp_symbols import SymbolNames
+from .symbol_value import SymbolValue, ValueCell
+from .variable_lookup import VariableLookup
+
+class LispWatch:
+    '''
+    A user-level watch on a Lisp variable
+
+    the value cell is found through the symbol's redirect. if it's a single
+    fixed word (a plain value, or the C variable behind a DEFVAR) a hardware
+    watchpoint goes straight on it: let-bindings of those variables write
+    the same word, so they're caught too, and the program runs at full
+    speed. anything whose cell depends on the current buffer or keyboard
+    falls back to marking the symbol as trapped, which makes emacs call
+    notify_variable_watchers (where we have one shared breakpoint) on every
+    set, let, unlet and makunbound
+
+    emacs notifies with whichever symbol was set, before following aliases,
+    so like add-variable-watcher the trap goes on the base variable and on
+    every alias of it
+    '''
+    watches: Dict[str, "LispWatch"] = {}
+
+    # cells that are one word at a fixed address, and what C type they hold
+    fixed_cells = {
+        "plain": "Lisp_Object",
+        "forwarded": "Lisp_Object",
+        "forwarded-int": "intmax_t",
+        "forwarded-bool": "_Bool",
+    }
+
+    def __init__(self, name: str, symbol: int):
+        self.name = name
+        self.symbol = symbol
+        self.printer = LispPrinter(max_depth=3, max_length=10, max_string=80)
+
+        self.breakpoint: Optional[gdb.Breakpoint] = None
+        self.mechanism = None
+
+    def watch(self, cell: ValueCell):
+        reason = f"{cell.kind} value"
+
+        if cell.kind in LispWatch.fixed_cells:
+            bp = ValueWatchpoint(self, cell)
+
+            if bp.type == gdb.BP_HARDWARE_WATCHPOINT:
+                self.breakpoint = bp
+                self.mechanism = f"hardware watchpoint on the {cell}"
+                return
+
+            # a software watchpoint would single-step the whole program
+            bp.delete()
+            reason = "no hardware watchpoint available"
+
+        self.trap()
+        self.breakpoint = TrappedWrites.get()
+        self.mechanism = f"variable watcher trap ({reason})"
+
+    def trap(self):
+        base = SymbolValue.indirect(self.symbol)
+
+        if SymbolValue.flag(LispTags.xsymbol(base), "u.s.trapped_write") == LispLayout.constant("SYMBOL_NOWRITE"):
+            raise ValueError(f"{self.name} is a constant")
+
+        TrappedWrites.get().add(base, self)
+
+    def report(self, old: Optional[int], new: Optional[int], how: str = ""):
+        old_str = "<void>" if old is None else self.printer.print(old)
+        new_str = "<void>" if new is None else self.printer.print(new)
+
+        print(f"lisp-watch {self.name}{how}:")
+        print(f"  old: {old_str}")
+        print(f"  new: {new_str}")
+
+    def delete(self):
+        if isinstance(self.breakpoint, ValueWatchpoint):
+            if self.breakpoint.is_valid():
+                self.breakpoint.delete()
+        elif TrappedWrites.instance is not None:
+            TrappedWrites.instance.remove(self)
+
+        LispWatch.watches.pop(self.name, None)
+
+    def __str__(self):
+        return f"{self.name} [{self.mechanism}]"
+
+    @staticmethod
+    def create(name: str) -> "LispWatch":
+        symbol = VariableLookup.lookup(name)
+
+        if symbol is None:
+            raise ValueError(f"no symbol called {name}")
+
+        word = symbol.word
+        watch = LispWatch(name, word)
+        watch.watch(SymbolValue.locate(word))
+
+        LispWatch.watches[name] = watch
+        return watch
+
+
+class ValueWatchpoint(gdb.Breakpoint):
+    '''
+    Hardware write watchpoint on a fixed value cell
+    '''
+    def __init__(self, watch: LispWatch, cell: ValueCell):
+        self.watch = watch
+        self.cell = cell
+        self.old = cell.read()
+
+        c_type = LispWatch.fixed_cells[cell.kind]
+        super().__init__(f"*({c_type} *) 0x{cell.addr:x}", gdb.BP_WATCHPOINT, gdb.WP_WRITE, internal=True)
+
+    def stop(self):
+        new = self.cell.read()
+
+        # written, but with the same value
+        if new == self.old:
+            return False
+
+        old, self.old = self.old, new
+        self.watch.report(old, new)
+        return True
+
+
+class TrappedWrites(gdb.Breakpoint):
+    '''
+    The one breakpoint on notify_variable_watchers, shared by every trapped watch
+
+    emacs calls it before the write, so the old value is still in place.
+    watches are keyed on the base variable, and the symbols we trapped for
+    it are put back the way they were once its last watch goes. the
+    breakpoint itself goes with the last watch
+    '''
+    instance: Optional["TrappedWrites"] = None
+
+    def __init__(self):
+        # base variable -> watches on it (through any of its names)
+        self.watched: Dict[int, List[LispWatch]] = {}
+        # base variable -> symbol address -> trapped_write before we set it
+        self.restore: Dict[int, Dict[int, int]] = {}
+        super().__init__("notify_variable_watchers", internal=True)
+
+    @staticmethod
+    def get() -> "TrappedWrites":
+        if TrappedWrites.instance is None or not TrappedWrites.instance.is_valid():
+            TrappedWrites.instance = TrappedWrites()
+
+        return TrappedWrites.instance
+
+    def add(self, base: int, watch: LispWatch):
+        symbols = [LispTags.xsymbol(watch.symbol)]
+
+        if base not in self.watched:
+            symbols += [LispTags.xsymbol(base)] + VariableLookup.aliases(base)
+            self.watched[base] = []
+            self.restore[base] = {}
+
+        untrapped = LispLayout.constant("SYMBOL_UNTRAPPED_WRITE")
+        restore = self.restore[base]
+
+        for addr in symbols:
+            if addr not in restore and SymbolValue.flag(addr, "u.s.trapped_write") == untrapped:
+                SymbolValue.set_flag(addr, "u.s.trapped_write", LispLayout.constant("SYMBOL_TRAPPED_WRITE"))
+                restore[addr] = untrapped
+
+        self.watched[base].append(watch)
+
+    def remove(self, watch: LispWatch):
+        for base, watches in list(self.watched.items()):
+            if watch not in watches:
+                continue
+
+            watches.remove(watch)
+
+            if not watches:
+                del self.watched[base]
+
+                for addr, trapped in self.restore.pop(base).items():
+                    SymbolValue.set_flag(addr, "u.s.trapped_write", trapped)
+
+        if not self.watched:
+            if self.is_valid():
+                self.delete()
+
+            TrappedWrites.instance = None
+
+    def stop(self):
+        frame = gdb.selected_frame()
+        symbol = LispTags.word(frame.read_var("symbol"))
+
+        # the symbol that was set, which may be an alias of what's watched
+        if symbol not in self.watched:
+            symbol = SymbolValue.indirect(symbol)
+
+        watches = self.watched.get(symbol)
+        if not watches:
+            return False
+
+        new = LispTags.word(frame.read_var("newval"))
+        operation = SymbolNames.name(LispTags.word(frame.read_var("operation")))
+
+        # makunbound passes Qunbound as the new value
+        unbound = SymbolNames.builtin("unbound")
+        old = SymbolValue.value(symbol)
+
+        for watch in watches:
+            watch.report(old, None if new == unbound else new, f" ({operation})")
+        return True
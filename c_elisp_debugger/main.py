@@ -0,0 +1,82 @@
+from typing import Optional
+
+from .lisp_layout import LispLayout
+from .lisp_stats import LispStats, StatsParameter
+from .lisp_memory import LispMemory
+from .lisp_types import LispObject
+from .lisp_gc import GCBreakpointParameter
+from .backtrace import MaxArgsParameter
+from .lisp_profile import ProfileFrequencyParameter
+from .breakpoints import LispDispatch
+from .lisp_trace import ReturnSite
+from .lisp_watch import ValueWatchpoint, TrappedWrites
+from .nav_manager import Manager
+from .commands import (PrintCommand, BufferTextCommand, BacktraceCommand, BreakCommand, StepCommand,
+                       NextCommand, UpCommand, ContinueCommand, StatsCommand, ProfileCommand,
+                       TraceCommand, WatchCommand)
+
+# the session's manager, once registered
+manager: Optional[Manager] = None
+
+def register() -> Manager:
+    '''
+    registers the parameters, commands and lisp-stats probes
+
+    none of it touches the inferior or its debug info, so this runs as
+    soon as the package is imported, even before emacs is loaded
+    '''
+    global manager
+
+    if manager is not None:
+        return manager
+
+    # SETTING UP VARIABLES
+    manager = Manager("MAIN")
+
+    # REGISTERING PARAMETERS
+    MaxArgsParameter()
+    StatsParameter()
+    ProfileFrequencyParameter()
+    GCBreakpointParameter()
+
+    # REGISTERING COMMANDS
+    PrintCommand()
+    BufferTextCommand()
+    BacktraceCommand(manager)
+
+    BreakCommand(manager)
+    StepCommand(manager)
+    NextCommand(manager)
+    UpCommand(manager)
+    ContinueCommand(manager)
+
+    StatsCommand()
+    ProfileCommand()
+    TraceCommand()
+    WatchCommand(manager)
+
+    # REGISTERING PROBES
+    # every expression the package evaluates goes through LispLayout.evaluate,
+    # so that's counted rather than patching gdb's module under everyone else
+    LispStats.probe("LispLayout.evaluate", LispLayout, "evaluate")
+    # every read of inferior memory ends up here
+    LispStats.probe("inferior.read_memory", LispMemory, "read_direct")
+
+    LispStats.probe("LispObject.create", LispObject, "create")
+
+    LispStats.probe("LispDispatch.stop", LispDispatch, "stop")
+    LispStats.probe("ReturnSite.stop", ReturnSite, "stop")
+    LispStats.probe("ValueWatchpoint.stop", ValueWatchpoint, "stop")
+    LispStats.probe("TrappedWrites.stop", TrappedWrites, "stop")
+
+    # counts from the commands' own work get attributed to them
+    for name, command in [("lisp-print", PrintCommand), ("lisp-buffer-text", BufferTextCommand),
+                          ("lisp-break", BreakCommand),
+                          ("lisp-backtrace", BacktraceCommand), ("lisp-step", StepCommand),
+                          ("lisp-next", NextCommand), ("lisp-up", UpCommand),
+                          ("lisp-continue", ContinueCommand),
+                          ("lisp-profile", ProfileCommand), ("lisp-trace", TraceCommand),
+                          ("lisp-watch", WatchCommand)]:
+        LispStats.probe(name, command, "invoke", command=True)
+
+    return manager
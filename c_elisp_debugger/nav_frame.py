@@ -1,6 +1,10 @@
 import gdb
 from enum import Enum, auto
 
+from .lisp_types import LispObject
+from .lisp_functions import CFunctions, LispFunction
+from .nav_pool import BreakpointLease, BreakpointPool, BreakpointRole
+
 class FrameType(Enum):
     ARG = auto()
     BODY = auto()
@@ -44,15 +48,20 @@ class Frame:
         self.bodies = bodies
         self.disabled = set()
 
+        self.adopt(self.args, BreakpointRole.ARG)
+        self.adopt(self.bodies, BreakpointRole.BODY)
+
         self.start = start
         # START is a breakpoint to enter the function
         # if it is None then we must already be in the function we care about
         if self.start:
+            self.adopt({self.start}, BreakpointRole.START)
+
             self.finish = None
             self.disable(*self.enabled)
             self.setup(in_function=False)
         else:
-            self.finish = gdb.FinishBreakpoint(internal=True)
+            self.make_finish()
 
             if self.skip:
                 self.disable(*self.enabled)
@@ -60,10 +69,8 @@ class Frame:
             else:
                 self.setup()
 
-    def hit(self, bp):
-        assert self.cares_about(bp)
-
-        if bp == self.start:
+    def hit(self, bp, role):
+        if role == BreakpointRole.START:
             self.do_start()
 
 
@@ -77,43 +84,53 @@ class Frame:
 
         assert(self.start is None) # just being defensive
         if self.skip:
-            assert bp == self.finish
+            assert role == BreakpointRole.FINISH
 
-        step_in = bp in self.looking_for()
+        step_in = self.stops_for(role)
 
-        if bp in self.args:
+        if role == BreakpointRole.ARG:
             if step_in:
                 print(f"== ARG == {self} ==")
 
             self.do_arg(bp, step_in)
-        elif bp in self.bodies:
+        elif role == BreakpointRole.BODY:
             if not step_in:
                 print(f"== BODY == {self} ==")
 
             self.do_body(bp, step_in)
-        elif bp == self.finish:
+        elif role == BreakpointRole.FINISH:
             if not self.skip:
                 print(f"== FINISH == {self} ==")
 
             self.do_finish(bp)
 
-    def cares_about(self, bp):
-        return bp in self.enabled or bp == self.finish or bp == self.start
-
-    def looking_for(self):
-        important_bps = set()
-
-        if self.command.value <= NavCommand.UP.value:
-            important_bps |= {self.finish}
+    def stops_for(self, role):
+        '''
+        whether the current nav command stops at this kind of breakpoint
+        '''
+        needs = {
+            BreakpointRole.FINISH: NavCommand.UP,
+            BreakpointRole.BODY: NavCommand.NEXT,
+            BreakpointRole.ARG: NavCommand.STEP,
+        }
 
+        return self.command.value <= needs[role].value
 
-        if self.command.value <= NavCommand.NEXT.value:
-            important_bps |= self.bodies
+    def adopt(self, leases, role):
+        '''
+        marks leases as ours so the manager can route hits straight here
 
-        if self.command.value <= NavCommand.STEP.value:
-            important_bps |= self.args
+        (a start can also be a plain FinishBreakpoint when rebuilding)
+        '''
+        for lease in leases:
+            if isinstance(lease, BreakpointLease):
+                lease.assign(self, role)
+            else:
+                self.manager.registry.register(lease, role, self)
 
-        return important_bps
+    def make_finish(self):
+        self.finish = gdb.FinishBreakpoint(internal=True)
+        self.manager.registry.register(self.finish, BreakpointRole.FINISH, self)
 
     def step(self):
         self.command = NavCommand.STEP
@@ -149,8 +166,13 @@ class Frame:
         pass
 
     def do_start(self):
+        # replaces the old temporary breakpoint
+        self.manager.registry.deregister(self.start)
+        if self.start.is_valid():
+            self.start.delete()
+
         self.start = None
-        self.finish = gdb.FinishBreakpoint(internal=True)
+        self.make_finish()
 
         self.enable()
         self.setup()
@@ -180,6 +202,12 @@ class Frame:
             if body.is_valid():
                 body.delete()
 
+        if self.start:
+            self.manager.registry.deregister(self.start)
+            if self.start.is_valid():
+                self.start.delete()
+
+        self.manager.registry.deregister(self.finish)
         if self.finish.is_valid():
             self.finish.delete()
 
@@ -209,13 +237,13 @@ class Frame:
 
 class EvalFrame(Frame):
     def __init__(self, manager, frame_type, start, skip, breakpoint=None):
-        args = { gdb.Breakpoint(label, internal=True) for label in [
+        args = { BreakpointPool.lease(label) for label in [
             "eval_sub:func_subr_arg_many",
             "eval_sub:func_subr_arg_n",
             "apply_lambda:func_lambda_args",
         ] }
 
-        bodies = { gdb.Breakpoint(label, internal=True) for label in [
+        bodies = { BreakpointPool.lease(label) for label in [
             "eval_sub:func_subr_body_many",
             "eval_sub:func_subr_body_n",
             "eval_sub:func_subr_body_unevalled",
@@ -253,7 +281,7 @@ class EvalFrame(Frame):
                 body.delete()
 
         #FIXME: this breakpoint triggers twice???
-        sub_start = gdb.Breakpoint("eval_sub", internal=True, temporary=True)
+        sub_start = BreakpointPool.lease("eval_sub")
 
         #always an eval I think...
         subframe = EvalFrame(self.manager, FrameType.ARG, sub_start, not step_in)
@@ -269,14 +297,14 @@ class EvalFrame(Frame):
 
         #need to construct the next frame
         if self.expr_type == ExprType.CONS:
-            sub_start = gdb.Breakpoint("eval_sub", internal=True, temporary=True)
+            sub_start = BreakpointPool.lease("eval_sub")
             subframe = EvalFrame(self.manager, FrameType.BODY, sub_start, not step_in)
         elif self.expr_type == ExprType.SUBR:
             fun = gdb.newest_frame().read_var("fun")
             subr = LispObject.create(fun)
 
             func_addr = f"*{LispObject.raw_object(subr.function())}"
-            sub_start = gdb.Breakpoint(func_addr, internal=True, temporary=True)
+            sub_start = BreakpointPool.lease(func_addr)
             subframe = PrimitiveFrame(self.manager, subr, sub_start, not step_in)
 
         self.step_in(subframe)
@@ -304,7 +332,7 @@ class PrimitiveFrame(Frame):
     def __init__(self, manager, subr, start, skip):
         self.subr = subr
 
-        bodies = { gdb.Breakpoint(func.value, internal=True)
+        bodies = { BreakpointPool.lease(func.value)
                    for func in CFunctions }
 
         #always in a body
@@ -341,7 +369,7 @@ class PrimitiveFrame(Frame):
 
 class LambdaFrame(Frame):
     def __init__(self, manager, frame_type, start, skip, breakpoint=None):
-        bodies = { gdb.Breakpoint("eval_sub", internal=True) }
+        bodies = { BreakpointPool.lease("eval_sub") }
 
         super().__init__(manager, frame_type, skip, start, set(), bodies, breakpoint=breakpoint)
 
@@ -370,7 +398,8 @@ class SubrFrame(Frame):
             subr = self.subr.subr
 
             func_addr = f"*{LispObject.raw_object(subr.function())}"
-            self.bodies = { gdb.Breakpoint(func_addr, internal=True) }
+            self.bodies = { BreakpointPool.lease(func_addr) }
+            self.adopt(self.bodies, BreakpointRole.BODY)
         else:
             self.subr = None
             self.bodies = set()
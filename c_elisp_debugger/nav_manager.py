@@ -1,12 +1,21 @@
 import gdb
 from enum import Enum, auto
 
+from .lisp_target import LispTarget
+from .lisp_functions import CFunctions
+from .specpdl import SpecpdlBacktrace
+from .breakpoints import LispBreakpoint
+from .lisp_trace import LispTrace
+from .nav_pool import BreakpointRegistry, BreakpointRole
+from .nav_frame import EvalFrame, Frame, FrameType, PrimitiveFrame
+
 class Manager:
     def __init__(self, name):
         self.name = name
 
         self.breakpoints = []
         self.recovery = None
+        self.registry = BreakpointRegistry()
         self.disabled = set()
 
         self.frames = []
@@ -24,26 +33,40 @@ class Manager:
         if not isinstance(event, gdb.BreakpointEvent):
             return
 
+        # a trace stopped to catch a return, and resumes by itself
+        if LispTrace.interim(event):
+            return
+
         events = {
             EventType.USER_BP: [],
             EventType.INNER_BP: [],
-            EventType.RECOVERY_BP: []
+            EventType.RECOVERY_BP: [],
+            EventType.WATCH_BP: []
         }
 
         for bp in event.breakpoints:
-            if bp in self.breakpoints:
-                events[EventType.USER_BP].append(bp)
+            entry = self.registry.lookup(bp)
 
-            if bp == self.recovery:
-                events[EventType.RECOVERY_BP].append(bp)
+            if entry is None:
+                continue
 
-            events[EventType.INNER_BP] = [ (bp, frame)
-                                           for frame in reversed(self.frames)
-                                           if frame.cares_about(bp) ]
+            role, owner, handle = entry
+
+            if role == BreakpointRole.USER:
+                # user breakpoints all share a dispatcher, which knows who matched
+                if bp.matched in self.breakpoints:
+                    events[EventType.USER_BP].append(bp.matched)
+            elif role == BreakpointRole.RECOVERY:
+                events[EventType.RECOVERY_BP].append(bp)
+            elif role == BreakpointRole.WATCH:
+                events[EventType.WATCH_BP].append(bp)
+            else:
+                events[EventType.INNER_BP].append((handle, owner, role))
 
         # need to figure out priorities of breakpoints
         if bps := events[EventType.RECOVERY_BP]:
             print("wow we made it :)")
+            self.registry.deregister(self.recovery)
             self.recovery = None
             frame = EvalFrame(self, FrameType.UNKNOWN, None)
             self.push(frame)
@@ -65,10 +88,13 @@ class Manager:
             # print(f"[{self}] {bp.location}")
             self.push(frame)
         elif events[EventType.INNER_BP]:
-            #take first one -- this will be the most recent frame which wants it
-            bp, frame = events[EventType.INNER_BP][0]
+            #take first one -- the pool hands hits to the most recent lease
+            bp, frame, role = events[EventType.INNER_BP][0]
 
-            frame.hit(bp)
+            frame.hit(bp, role)
+        elif events[EventType.WATCH_BP]:
+            # the watch already said what changed
+            pass
         else:
             print("dunno why this happens :( -- just execute: continue")
 
@@ -88,6 +114,9 @@ class Manager:
             self.breakpoints.append(eval)
             self.breakpoints.append(subr)
 
+            self.registry.register(eval.dispatch, BreakpointRole.USER)
+            self.registry.register(subr.dispatch, BreakpointRole.USER)
+
         return (eval, subr)
 
     def disable(self, breakpoint):
@@ -154,6 +183,13 @@ class Manager:
                 if CFunctions.cool_func(frame.name()):
                     return (frame, CFunctions(frame.name()))
 
+        # the specpdl knows whether there's any Lisp left without a C walk,
+        # and its bounds are enough to tell: no need to read it
+        start, end = SpecpdlBacktrace.bounds()
+        if end <= start:
+            print("no more frames to use")
+            return
+
         prev = find_prev_frame(gdb.newest_frame())
         if prev is None:
             print("no more frames to use")
@@ -174,6 +210,7 @@ class Manager:
         # to recover just create a new frame
         # just set that frame to start when program execution
         # returns to the underlying frame
+        # registered as the new frame's START when it's constructed
         func_frame = Frame.frame_wrapper(func)
         recovery = gdb.FinishBreakpoint(one_before, internal=True)
         recovery_frame = func_frame(self, FrameType.UNKNOWN, recovery, False)
@@ -190,6 +227,9 @@ class Manager:
                 and self.head().guts)
 
     def step(self):
+        if not LispTarget.require_live("lisp-step"):
+            return
+
         if self.empty():
             print("get into lisp first!")
         elif self.in_guts():
@@ -198,6 +238,9 @@ class Manager:
             self.head().step()
 
     def next(self):
+        if not LispTarget.require_live("lisp-next"):
+            return
+
         if self.empty():
             print("get into lisp first!")
         elif self.in_guts():
@@ -207,12 +250,18 @@ class Manager:
             self.head().next()
 
     def up(self):
+        if not LispTarget.require_live("lisp-up"):
+            return
+
         if self.empty():
             print("get into lisp first!")
         else:
             self.head().up()
 
     def cont(self):
+        if not LispTarget.require_live("lisp-continue"):
+            return
+
         if not (self.enabled()
                 or self.recovery):
             print("get into lisp first!")
@@ -244,3 +293,4 @@ class EventType(Enum):
     USER_BP = auto()
     INNER_BP = auto()
     RECOVERY_BP = auto()
+    WATCH_BP = auto()
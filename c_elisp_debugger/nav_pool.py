@@ -0,0 +1,157 @@
+import gdb
+from enum import Enum, auto
+from typing import Dict, List, Optional, Tuple
+
+class BreakpointRole(Enum):
+    USER = auto()
+    RECOVERY = auto()
+    START = auto()
+    ARG = auto()
+    BODY = auto()
+    FINISH = auto()
+    WATCH = auto()
+
+
+class BreakpointPool:
+    '''
+    Internal breakpoints shared by every navigation frame
+
+    each location gets one gdb breakpoint for the whole session. frames hold
+    leases on them, and the real breakpoint is only enabled while at least
+    one lease is. stepping just flips enabled flags instead of resolving
+    locations and patching code every time a frame is pushed or popped
+    '''
+    breakpoints: Dict[str, gdb.Breakpoint] = {}
+    locations: Dict[gdb.Breakpoint, str] = {}
+    # enabled leases per location, most recently enabled last
+    holders: Dict[str, List["BreakpointLease"]] = {}
+
+    @staticmethod
+    def breakpoint(location: str) -> gdb.Breakpoint:
+        bp = BreakpointPool.breakpoints.get(location)
+
+        if bp is None or not bp.is_valid():
+            bp = gdb.Breakpoint(location, internal=True)
+            bp.enabled = False
+
+            BreakpointPool.breakpoints[location] = bp
+            BreakpointPool.locations[bp] = location
+            BreakpointPool.holders[location] = []
+
+        return bp
+
+    @staticmethod
+    def lease(location: str) -> "BreakpointLease":
+        return BreakpointLease(location)
+
+    @staticmethod
+    def acquire(lease: "BreakpointLease"):
+        BreakpointPool.holders[lease.location].append(lease)
+        BreakpointPool.breakpoints[lease.location].enabled = True
+
+    @staticmethod
+    def release(lease: "BreakpointLease"):
+        holders = BreakpointPool.holders[lease.location]
+
+        # might be gone already if the breakpoint had to be recreated
+        if lease in holders:
+            holders.remove(lease)
+
+        if not holders:
+            BreakpointPool.breakpoints[lease.location].enabled = False
+
+    @staticmethod
+    def holder(bp: gdb.Breakpoint) -> Optional["BreakpointLease"]:
+        '''
+        the lease a hit on this pooled breakpoint belongs to
+        '''
+        location = BreakpointPool.locations.get(bp)
+        holders = BreakpointPool.holders.get(location)
+
+        return holders[-1] if holders else None
+
+
+class BreakpointLease:
+    '''
+    A frame's handle on a pooled breakpoint
+
+    quacks like the gdb.Breakpoint it replaced: location, enabled,
+    delete() and is_valid() all behave the same from the frame's side
+    '''
+    def __init__(self, location: str):
+        self.location = location
+        self.breakpoint = BreakpointPool.breakpoint(location)
+
+        self.owner = None
+        self.role = None
+
+        self.valid = True
+        self._enabled = False
+        self.enabled = True
+
+    def assign(self, owner, role: BreakpointRole):
+        self.owner = owner
+        self.role = role
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        if not self.valid or value == self._enabled:
+            return
+
+        # the pooled breakpoint could have been deleted by the user
+        if not self.breakpoint.is_valid():
+            self.breakpoint = BreakpointPool.breakpoint(self.location)
+
+        if value:
+            BreakpointPool.acquire(self)
+        else:
+            BreakpointPool.release(self)
+
+        self._enabled = value
+
+    def is_valid(self) -> bool:
+        return self.valid
+
+    def delete(self):
+        self.enabled = False
+        self.valid = False
+
+    def __str__(self):
+        return f"lease on {self.location}"
+
+
+class BreakpointRegistry:
+    '''
+    Maps every gdb breakpoint we stop on to whoever owns it
+
+    pooled breakpoints are answered by the pool (whoever holds the newest
+    enabled lease), everything else is registered here directly. either way
+    routing a stop is a dict lookup instead of asking every frame
+    '''
+    def __init__(self):
+        self.owners: Dict[gdb.Breakpoint, Tuple[BreakpointRole, object]] = {}
+
+    def register(self, bp: gdb.Breakpoint, role: BreakpointRole, owner=None):
+        self.owners[bp] = (role, owner)
+
+    def deregister(self, bp: gdb.Breakpoint):
+        self.owners.pop(bp, None)
+
+    def lookup(self, bp: gdb.Breakpoint):
+        '''
+        returns (role, owner, handle) -- handle is what the owner knows the
+        breakpoint as (the lease, for pooled ones)
+        '''
+        if (entry := self.owners.get(bp)) is not None:
+            role, owner = entry
+            return role, owner, bp
+
+        lease = BreakpointPool.holder(bp)
+        if lease is not None and lease.owner is not None:
+            return lease.role, lease.owner, lease
+
+        return None
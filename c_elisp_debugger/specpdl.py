@@ -0,0 +1,124 @@
+import gdb
+import struct
+from typing import List, Optional
+
+from .lisp_layout import LispLayout
+from .lisp_memory import LispMemory
+from .lisp_printer import LispPrinter
+from .backtrace import MaxArgsParameter
+
+class SpecpdlFrame:
+    '''
+    One SPECPDL_BACKTRACE entry: a Lisp function and its args
+
+    nargs is UNEVALLED for special forms, in which case args points at a
+    single Lisp_Object holding the (unevaluated) argument forms
+    '''
+    def __init__(self, level: int, function: int, args: int, nargs: int):
+        self.level = level
+        self.function = function
+        self.args = args
+        self.nargs = nargs
+
+    @property
+    def unevalled(self) -> bool:
+        return self.nargs == LispLayout.constant("UNEVALLED")
+
+    def arg_words(self, limit: Optional[int] = None) -> List[int]:
+        count = 1 if self.unevalled else self.nargs
+
+        if limit is not None:
+            count = min(count, limit)
+
+        return LispMemory.words(self.args, count)
+
+    def name(self) -> str:
+        printer = LispPrinter(max_depth=2, max_length=4)
+        return printer.print(self.function)
+
+    def __str__(self) -> str:
+        printer = LispPrinter(max_depth=3, max_length=10, max_string=60)
+        limit = MaxArgsParameter.limit()
+
+        try:
+            if self.unevalled:
+                forms = printer.print(self.arg_words()[0])
+                # print the arg forms as the tail of the call
+                rest = "" if forms == "nil" else " " + forms[1:-1]
+                return f"({self.name()}{rest})"
+
+            args = [printer.print(word) for word in self.arg_words(limit)]
+            if limit is not None and self.nargs > limit:
+                args.append("...")
+
+            return f"({' '.join([self.name()] + args)})"
+        except gdb.MemoryError:
+            return f"({self.name()} #<unreadable args>)"
+
+
+class SpecpdlBacktrace:
+    '''
+    Lisp backtrace read straight out of the specpdl stack
+
+    emacs already records every Lisp call (interpreted, byte-compiled or
+    native-compiled) as a SPECPDL_BACKTRACE entry, so we read the whole stack
+    in one go instead of walking C frames. entries are only decoded when asked
+    for, and frame N is random access
+    '''
+    def __init__(self):
+        start, end = SpecpdlBacktrace.bounds()
+        size = LispLayout.sizeof("union specbinding")
+
+        self.start = start
+        self.size = size
+        self.raw = bytes(LispMemory.read(start, end - start)) if end > start else b""
+
+        backtrace = LispLayout.constant("SPECPDL_BACKTRACE")
+
+        # kind is a CHAR_BIT wide bitfield at the very start of every entry
+        # newest first, so index N is frame N
+        self.entries = [ offset for offset in range(len(self.raw) - size, -1, -size)
+                         if self.raw[offset] == backtrace ]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def frame(self, level: int) -> SpecpdlFrame:
+        offset = self.entries[level]
+        fmt = LispMemory.word_format()
+        signed = LispMemory.word_format(signed=True)
+
+        function, = struct.unpack_from(fmt, self.raw, offset + LispLayout.offset("union specbinding", "bt.function"))
+        args, = struct.unpack_from(fmt, self.raw, offset + LispLayout.offset("union specbinding", "bt.args"))
+        nargs, = struct.unpack_from(signed, self.raw, offset + LispLayout.offset("union specbinding", "bt.nargs"))
+
+        return SpecpdlFrame(level, function, args, nargs)
+
+    def frames(self, count: Optional[int] = None):
+        '''
+        count works like backtrace: N innermost, -N outermost
+        '''
+        levels = range(len(self))
+
+        if count is not None and count >= 0:
+            levels = levels[:count]
+        elif count is not None:
+            levels = levels[count:]
+
+        for level in levels:
+            yield self.frame(level)
+
+    @staticmethod
+    def bounds():
+        '''
+        [specpdl, specpdl_ptr) -- per thread since emacs 26
+        '''
+        try:
+            thread = LispMemory.pointer(LispLayout.address("current_thread"))
+            start = LispMemory.pointer(thread + LispLayout.offset("struct thread_state", "m_specpdl"))
+            end = LispMemory.pointer(thread + LispLayout.offset("struct thread_state", "m_specpdl_ptr"))
+        except gdb.error:
+            start = LispMemory.pointer(LispLayout.address("specpdl"))
+            end = LispMemory.pointer(LispLayout.address("specpdl_ptr"))
+
+        return start, end
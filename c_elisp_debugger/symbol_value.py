@@ -0,0 +1,201 @@
+import gdb
+from typing import Optional
+
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_memory import LispMemory
+from .lisp_symbols import SymbolNames
+
+class ValueCell:
+    '''
+    Where a symbol's current value actually lives
+
+    kind says how to read it: most are a Lisp_Object word at addr, but
+    DEFVAR_INT/DEFVAR_BOOL variables forward to a raw C intmax_t/bool
+    '''
+    def __init__(self, kind: str, addr: int):
+        self.kind = kind
+        self.addr = addr
+
+    @property
+    def size(self) -> int:
+        if self.kind == "forwarded-int":
+            return LispLayout.sizeof("intmax_t")
+        elif self.kind == "forwarded-bool":
+            return LispLayout.sizeof("_Bool")
+
+        return LispLayout.sizeof("Lisp_Object")
+
+    def read(self) -> int:
+        '''
+        the value as a tagged word
+        '''
+        if self.kind == "forwarded-int":
+            fmt = ("<" if LispLayout.little_endian() else ">") + {4: "i", 8: "q"}[self.size]
+            return LispTags.make_fixnum(LispMemory.unpack(fmt, self.addr)[0])
+        elif self.kind == "forwarded-bool":
+            value = bytes(LispMemory.read(self.addr, 1))[0]
+            return SymbolNames.builtin("t") if value else LispLayout.nil_word()
+
+        return LispMemory.word(self.addr)
+
+    def __str__(self):
+        return f"{self.kind} @0x{self.addr:x}"
+
+
+class SymbolValue:
+    '''
+    Reads symbol values from memory, following the symbol's redirect
+
+    this is find_symbol_value without the inferior call (so it also works on
+    cores), and without swapping buffer-local bindings in as a side effect
+    '''
+    max_aliases = 100
+
+    @staticmethod
+    def flag(addr: int, field: str) -> int:
+        '''
+        one of struct Lisp_Symbol's bitfields, e.g. "u.s.redirect"
+        '''
+        byte, bit, width = LispLayout.bitfield("struct Lisp_Symbol", field)
+        raw = bytes(LispMemory.read(addr + byte, 1 + (bit + width - 1) // 8))
+        mask = (1 << width) - 1
+
+        if LispLayout.little_endian():
+            return (int.from_bytes(raw, "little") >> bit) & mask
+
+        return (int.from_bytes(raw, "big") >> (len(raw) * 8 - bit - width)) & mask
+
+    @staticmethod
+    def set_flag(addr: int, field: str, value: int):
+        byte, bit, width = LispLayout.bitfield("struct Lisp_Symbol", field)
+        raw = bytes(LispMemory.read(addr + byte, 1 + (bit + width - 1) // 8))
+        mask = (1 << width) - 1
+
+        order = "little" if LispLayout.little_endian() else "big"
+        shift = bit if order == "little" else len(raw) * 8 - bit - width
+
+        bits = int.from_bytes(raw, order) & ~(mask << shift) | (value & mask) << shift
+        gdb.selected_inferior().write_memory(addr + byte, bits.to_bytes(len(raw), order))
+
+    @staticmethod
+    def redirect(addr: int) -> str:
+        value = SymbolValue.flag(addr, "u.s.redirect")
+
+        for kind in ["SYMBOL_PLAINVAL", "SYMBOL_VARALIAS", "SYMBOL_LOCALIZED", "SYMBOL_FORWARDED"]:
+            if LispLayout.constant(kind) == value:
+                return kind
+
+        raise ValueError(f"unknown symbol redirect {value}")
+
+    @staticmethod
+    def current_buffer() -> int:
+        try:
+            thread = LispMemory.pointer(LispLayout.address("current_thread"))
+            return LispMemory.pointer(thread + LispLayout.offset("struct thread_state", "m_current_buffer"))
+        except gdb.error:
+            return LispMemory.pointer(LispLayout.address("current_buffer"))
+
+    @staticmethod
+    def forwarded(fwd: int) -> ValueCell:
+        endian = "<" if LispLayout.little_endian() else ">"
+        fwd_type = LispMemory.unpack(f"{endian}I", fwd)[0]
+
+        if fwd_type == LispLayout.constant("Lisp_Fwd_Int"):
+            return ValueCell("forwarded-int", LispMemory.pointer(fwd + LispLayout.offset("struct Lisp_Intfwd", "intvar")))
+        elif fwd_type == LispLayout.constant("Lisp_Fwd_Bool"):
+            return ValueCell("forwarded-bool", LispMemory.pointer(fwd + LispLayout.offset("struct Lisp_Boolfwd", "boolvar")))
+        elif fwd_type == LispLayout.constant("Lisp_Fwd_Obj"):
+            return ValueCell("forwarded", LispMemory.pointer(fwd + LispLayout.offset("struct Lisp_Objfwd", "objvar")))
+        elif fwd_type == LispLayout.constant("Lisp_Fwd_Buffer_Obj"):
+            offset = LispMemory.unpack(f"{endian}i", fwd + LispLayout.offset("struct Lisp_Buffer_Objfwd", "offset"))[0]
+            return ValueCell("buffer-slot", SymbolValue.current_buffer() + offset)
+        elif fwd_type == LispLayout.constant("Lisp_Fwd_Kboard_Obj"):
+            offset = LispMemory.unpack(f"{endian}i", fwd + LispLayout.offset("struct Lisp_Kboard_Objfwd", "offset"))[0]
+            return ValueCell("kboard-slot", LispMemory.pointer(LispLayout.address("current_kboard")) + offset)
+
+        raise ValueError(f"unknown forwarding type {fwd_type}")
+
+    @staticmethod
+    def localized(symbol: int, blv: int) -> ValueCell:
+        '''
+        buffer-local: the current buffer's binding, or the default one
+
+        a forwarded variable holds the binding of blv->where, which is only
+        the current buffer's once swap_in_symval_forwarding has run for it.
+        whichever binding it holds isn't written back to its cons until
+        it's swapped out
+        '''
+        struct = "struct Lisp_Buffer_Local_Value"
+        fwd = LispMemory.pointer(blv + LispLayout.offset(struct, "fwd"))
+        buffer = SymbolValue.current_buffer()
+
+        if fwd and LispTags.xpntr(LispMemory.word(blv + LispLayout.offset(struct, "where"))) == buffer:
+            return SymbolValue.forwarded(fwd)
+
+        car = LispLayout.offset("struct Lisp_Cons", "u.s.car")
+        cdr = LispLayout.offset("struct Lisp_Cons", "u.s.u.cdr")
+        nil = LispLayout.nil_word()
+
+        alist = LispMemory.word(buffer + LispLayout.offset("struct buffer", "local_var_alist_"))
+
+        while alist != nil and LispTags.classify(alist)[0] == "Lisp_Cons":
+            binding = LispMemory.word(LispTags.xpntr(alist) + car)
+
+            if LispMemory.word(LispTags.xpntr(binding) + car) == symbol:
+                return ValueCell("buffer-local", LispTags.xpntr(binding) + cdr)
+
+            alist = LispMemory.word(LispTags.xpntr(alist) + cdr)
+
+        defcell = LispMemory.word(blv + LispLayout.offset(struct, "defcell"))
+
+        # the default binding is the one swapped in, for some other buffer
+        if fwd and LispMemory.word(blv + LispLayout.offset(struct, "valcell")) == defcell:
+            return SymbolValue.forwarded(fwd)
+
+        return ValueCell("buffer-default", LispTags.xpntr(defcell) + cdr)
+
+    @staticmethod
+    def indirect(symbol: int) -> int:
+        '''
+        the variable symbol is an alias of (itself if it isn't one), like
+        Findirect_variable
+        '''
+        for _ in range(SymbolValue.max_aliases):
+            addr = LispTags.xsymbol(symbol)
+
+            if SymbolValue.redirect(addr) != "SYMBOL_VARALIAS":
+                return symbol
+
+            symbol = LispTags.make_symbol(LispMemory.pointer(addr + LispLayout.offset("struct Lisp_Symbol", "u.s.val")))
+
+        raise ValueError("cyclic variable aliases")
+
+    @staticmethod
+    def locate(symbol: int) -> ValueCell:
+        '''
+        follows aliases and forwarding to the cell holding symbol's value
+        '''
+        for _ in range(SymbolValue.max_aliases):
+            addr = LispTags.xsymbol(symbol)
+            redirect = SymbolValue.redirect(addr)
+            val = addr + LispLayout.offset("struct Lisp_Symbol", "u.s.val")
+
+            if redirect == "SYMBOL_PLAINVAL":
+                return ValueCell("plain", val)
+            elif redirect == "SYMBOL_VARALIAS":
+                symbol = LispTags.make_symbol(LispMemory.pointer(val))
+            elif redirect == "SYMBOL_LOCALIZED":
+                return SymbolValue.localized(symbol, LispMemory.pointer(val))
+            else:
+                return SymbolValue.forwarded(LispMemory.pointer(val))
+
+        raise ValueError("cyclic variable aliases")
+
+    @staticmethod
+    def value(symbol: int) -> Optional[int]:
+        '''
+        the value as a tagged word, or None if the symbol is void
+        '''
+        word = SymbolValue.locate(symbol).read()
+        return None if word == SymbolNames.builtin("unbound") else word
@@ -0,0 +1,115 @@
+import json
+import struct
+import sys
+from typing import Iterator, List
+
+class TraceLog:
+    '''
+    The lisp-trace file format
+
+    a magic line, then records of a u32 length followed by the payload:
+    u8 kind, u64 nanoseconds since the trace started, u32 call number,
+    u16 depth, u16 string count, and the strings (u32 length + utf-8).
+    calls carry the function name then its args, returns the name and the
+    value, unwinds (non-local exits) just the name. all little endian
+
+    no gdb in here, so the reader works as a plain script:
+        python3 -m c_elisp_debugger.trace_log FILE [--json]
+    '''
+    magic = b"LISPTRACE 1\n"
+
+    CALL = 1
+    RETURN = 2
+    UNWIND = 3
+    kinds = { CALL: "call", RETURN: "return", UNWIND: "unwind" }
+
+    header = struct.Struct("<BQIHH")
+    length = struct.Struct("<I")
+
+
+class TraceWriter:
+    '''
+    Appends records through a big userspace buffer, so a record costs a
+    couple of memcpys instead of a write syscall
+    '''
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        self.file = open(path, "wb", buffering=buffer_size)
+        self.file.write(TraceLog.magic)
+
+    def write(self, kind: int, timestamp: int, call: int, depth: int, strings: List[str]):
+        parts = [TraceLog.header.pack(kind, timestamp, call, min(depth, 0xffff), len(strings))]
+
+        for string in strings:
+            data = string.encode("utf-8", errors="replace")
+            parts += [TraceLog.length.pack(len(data)), data]
+
+        payload = b"".join(parts)
+        self.file.write(TraceLog.length.pack(len(payload)))
+        self.file.write(payload)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class TraceReader:
+    def __init__(self, path: str):
+        self.path = path
+
+    def records(self) -> Iterator[dict]:
+        with open(self.path, "rb") as f:
+            if f.read(len(TraceLog.magic)) != TraceLog.magic:
+                raise ValueError(f"{self.path} is not a lisp-trace log")
+
+            while len(prefix := f.read(TraceLog.length.size)) == TraceLog.length.size:
+                size, = TraceLog.length.unpack(prefix)
+                payload = f.read(size)
+
+                # the tail of a log still being written
+                if len(payload) < size:
+                    return
+
+                kind, timestamp, call, depth, count = TraceLog.header.unpack_from(payload)
+                offset = TraceLog.header.size
+                strings = []
+
+                for _ in range(count):
+                    length, = TraceLog.length.unpack_from(payload, offset)
+                    offset += TraceLog.length.size
+                    strings.append(payload[offset:offset + length].decode("utf-8", errors="replace"))
+                    offset += length
+
+                yield { "kind": TraceLog.kinds.get(kind, str(kind)), "time": timestamp / 1e9,
+                        "call": call, "depth": depth, "strings": strings }
+
+    @staticmethod
+    def text(record: dict) -> str:
+        '''
+        trace.el style: "| 2 -> (fib 3)" on the way in, "| 2 <- fib: 2" on the way out
+        '''
+        indent = "| " * (record["depth"] - 1)
+        stamp = f"[{record['time']:12.6f}] #{record['call']:<6}"
+
+        if record["kind"] == "call":
+            name, *args = record["strings"]
+            return f"{stamp} {indent}{record['depth']} -> ({' '.join([name] + args)})"
+        elif record["kind"] == "return":
+            name, value = record["strings"]
+            return f"{stamp} {indent}{record['depth']} <- {name}: {value}"
+
+        return f"{stamp} {indent}{record['depth']} <- {record['strings'][0]}: (non-local exit)"
+
+    def dump(self, as_json: bool = False):
+        for record in self.records():
+            print(json.dumps(record) if as_json else TraceReader.text(record))
+
+
+# only as a script: gdb sources this file as __main__ too
+if __name__ == "__main__" and "gdb" not in sys.modules:
+    if len(sys.argv) not in (2, 3) or (len(sys.argv) == 3 and sys.argv[2] != "--json"):
+        print("usage: python3 -m c_elisp_debugger.trace_log FILE [--json]", file=sys.stderr)
+        sys.exit(2)
+
+    TraceReader(sys.argv[1]).dump(as_json=len(sys.argv) == 3)
@@ -0,0 +1,190 @@
+import gdb
+from typing import Dict, List, Optional, Tuple
+
+from .lisp_layout import LispLayout
+from .lisp_tags import LispTags
+from .lisp_memory import LispMemory
+from .lisp_gc import LispGC
+from .lisp_printer import LispPrinter
+from .lisp_symbols import SymbolNames
+from .symbol_value import SymbolValue
+from .lisp_types import LispObject, LispSymbol
+
+class ObarrayIndex:
+    '''
+    Symbol name -> symbol address for everything interned in an obarray
+
+    built by reading the bucket array in one go and walking each chain from
+    memory. intern pushes new symbols onto the front of a bucket, so a
+    refresh only re-walks buckets whose head word changed (or everything if
+    the obarray itself was replaced or resized). a re-walked bucket drops
+    the names it had first, since unintern can take any of them out
+    '''
+    def __init__(self, obarray: str):
+        self.obarray = obarray
+
+        self.names: Dict[str, int] = {}
+        # names found in each bucket on its last walk
+        self.bucket_names: List[List[str]] = []
+        self.heads: List[int] = []
+        self.shape: Optional[Tuple[int, int]] = None
+        # GC epoch each name was last walked or checked in
+        self.epochs: Dict[str, Tuple] = {}
+
+    def read_buckets(self) -> Tuple[Tuple[int, int], List[int]]:
+        word = LispMemory.word(LispLayout.address(self.obarray))
+        tag, pvec = LispTags.classify(word)
+        addr = LispTags.xpntr(word)
+
+        if pvec == "PVEC_NORMAL_VECTOR":
+            size = LispPrinter.vector_size(word)
+            buckets = addr + LispLayout.offset("struct Lisp_Vector", "contents")
+        elif pvec == "PVEC_OBARRAY":
+            # emacs 30+ has a real obarray type that grows
+            endian = "<" if LispLayout.little_endian() else ">"
+            size_bits_at = addr + LispLayout.offset("struct Lisp_Obarray", "size_bits")
+
+            size = 1 << LispMemory.unpack(f"{endian}I", size_bits_at)[0]
+            buckets = LispMemory.pointer(addr + LispLayout.offset("struct Lisp_Obarray", "buckets"))
+        else:
+            raise ValueError(f"{self.obarray} is not an obarray")
+
+        return (word, size), LispMemory.words(buckets, size)
+
+    def walk_bucket(self, index: int, head: int, epoch: Tuple):
+        for name in self.bucket_names[index]:
+            self.names.pop(name, None)
+            self.epochs.pop(name, None)
+
+        found = self.bucket_names[index] = []
+
+        if LispTags.classify(head)[0] != "Lisp_Symbol":
+            return
+
+        next_offset = LispLayout.offset("struct Lisp_Symbol", "u.s.next")
+        addr = LispTags.xsymbol(head)
+
+        # next is a real pointer (not a lispsym offset), NULL at the end
+        while addr:
+            name = SymbolNames.name_at(addr, remember=False)
+            self.names[name] = addr
+            self.epochs[name] = epoch
+            found.append(name)
+
+            addr = LispMemory.pointer(addr + next_offset)
+
+    def refresh(self):
+        shape, heads = self.read_buckets()
+        epoch = LispGC.epoch()
+
+        if shape != self.shape:
+            self.names.clear()
+            self.epochs.clear()
+            self.bucket_names = [[] for _ in heads]
+            old_heads = [None] * len(heads)
+        else:
+            old_heads = self.heads
+
+        for index, (head, old) in enumerate(zip(heads, old_heads)):
+            if head != old:
+                self.walk_bucket(index, head, epoch)
+
+        self.shape = shape
+        self.heads = heads
+
+    def lookup(self, name: str) -> Optional[int]:
+        addr = self.names.get(name)
+
+        # a collection could have freed an uninterned symbol and reused
+        # its memory, so a hit gets its name checked once per epoch
+        if addr is not None and self.epochs.get(name) != (epoch := LispGC.epoch()):
+            if SymbolNames.name_at(addr, remember=False) == name:
+                self.epochs[name] = epoch
+            else:
+                del self.names[name]
+                del self.epochs[name]
+                addr = None
+
+        # unintern from the middle of a bucket leaves its head alone, so
+        # that bucket won't be rewalked
+        if addr is not None and SymbolValue.flag(addr, "u.s.interned") == LispLayout.constant("SYMBOL_UNINTERNED"):
+            del self.names[name]
+            del self.epochs[name]
+            addr = None
+
+        if addr is None:
+            self.refresh()
+            addr = self.names.get(name)
+
+        return addr
+
+    def completions(self, prefix: str) -> List[str]:
+        # cheap when nothing changed: one bulk read and a diff of the heads
+        self.refresh()
+
+        return sorted(name for name in self.names if name.startswith(prefix))
+
+
+class VariableLookup:
+    indexes: Dict[str, ObarrayIndex] = {}
+
+    @staticmethod
+    def index(obarray: str) -> ObarrayIndex:
+        if obarray not in VariableLookup.indexes:
+            VariableLookup.indexes[obarray] = ObarrayIndex(obarray)
+
+        return VariableLookup.indexes[obarray]
+
+    @staticmethod
+    def lookup(sym_name, obarray="globals.f_Vobarray"):
+        addr = VariableLookup.index(obarray).lookup(sym_name)
+
+        if addr is None:
+            return None
+
+        symbol = LispObject.from_word(LispTags.make_symbol(addr))
+        if isinstance(symbol, LispSymbol):
+            return symbol
+
+    @staticmethod
+    def aliases(base: int, obarray="globals.f_Vobarray") -> List[int]:
+        '''
+        addresses of the interned symbols that are aliases of base
+
+        like harmonize_variable_watchers this goes through the whole obarray
+        '''
+        index = VariableLookup.index(obarray)
+        index.refresh()
+
+        return [addr for addr in index.names.values()
+                if SymbolValue.redirect(addr) == "SYMBOL_VARALIAS"
+                and SymbolValue.indirect(LispTags.make_symbol(addr)) == base]
+
+    @staticmethod
+    def completions(prefix, obarray="globals.f_Vobarray"):
+        try:
+            return VariableLookup.index(obarray).completions(prefix)
+        except (gdb.error, gdb.MemoryError, ValueError):
+            return []
+
+    @staticmethod
+    def get_val(sym_name, obarray="globals.f_Vobarray"):
+        symbol = VariableLookup.lookup(sym_name, obarray)
+
+        if symbol is None:
+            return None
+
+        word = SymbolValue.value(symbol.word)
+
+        if word is None:
+            return None
+
+        return LispObject.from_word(word)
+
+    @staticmethod
+    def reset(event=None):
+        VariableLookup.indexes.clear()
+
+
+gdb.events.exited.connect(VariableLookup.reset)
+LispLayout.on_invalidate(VariableLookup.reset)
@@ -0,0 +1,12 @@
+# objfile auto-load script: gdb runs it when it loads an objfile called
+# emacs. symlink it next to the emacs binary (as emacs-gdb.py) or into
+# your auto-load scripts directory, and allow it with add-auto-load-safe-path
+import os
+import sys
+
+here = os.path.dirname(os.path.realpath(__file__))
+
+if here not in sys.path:
+    sys.path.insert(0, here)
+
+import c_elisp_debugger
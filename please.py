@@ -1 +1,3 @@
+from c_elisp_debugger.backtrace import LispFrameFilter
+
 lisp_filter = LispFrameFilter()
@@ -0,0 +1,41 @@
+import pytest
+
+from c_elisp_debugger.internal_text import InternalText
+
+
+@pytest.mark.parametrize("raw, text", [
+    (b"abc", "abc"),
+    ("é中😀".encode(), "é中😀"),
+    # raw bytes 80..FF, as C0/C1 plus one byte
+    (b"\xc0\x80", "\\200"),
+    (b"a\xc1\xbfb", "a\\377b"),
+    # a surrogate
+    (b"\xed\xa0\x80", "\\xd800"),
+    # 4 byte sequences past unicode
+    (b"\xf4\x90\x80\x80", "\\x110000"),
+    (b"\xf7\xbf\xbf\xbf", "\\x1fffff"),
+    # 5 byte sequences, up to MAX_5_BYTE_CHAR
+    (b"\xf8\x88\x80\x80\x80", "\\x200000"),
+    (b"\xf8\x8f\xbf\xbd\xbf", "\\x3fff7f"),
+])
+def test_multibyte(raw, text):
+    assert InternalText.decode(raw, True) == text
+
+
+@pytest.mark.parametrize("raw, text", [
+    # cut off mid-character, e.g. by a string limit
+    (b"\xc3", "\\303"),
+    (b"\xf8\x88", "\\370\\210"),
+    # starting mid-character
+    (b"\x80x", "\\200x"),
+])
+def test_partial_characters(raw, text):
+    assert InternalText.decode(raw, True) == text
+
+
+def test_unibyte():
+    assert InternalText.decode(b"\xff\xc1\xbf", False) == "\xff\xc1\xbf"
+
+
+def test_memoryview():
+    assert InternalText.decode(memoryview(b"a\xc1\xbf"), True) == "a\\377"
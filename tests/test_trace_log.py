@@ -0,0 +1,67 @@
+import pytest
+
+from c_elisp_debugger.trace_log import TraceLog, TraceReader, TraceWriter
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "trace.log"
+
+    writer = TraceWriter(str(path))
+    writer.write(TraceLog.CALL, 1_500_000_000, 1, 1, ["fib", "3"])
+    writer.write(TraceLog.CALL, 1_600_000_000, 2, 2, ["fib", "2"])
+    writer.write(TraceLog.RETURN, 1_700_000_000, 2, 2, ["fib", "1"])
+    writer.write(TraceLog.UNWIND, 1_800_000_000, 1, 1, ["fib"])
+    writer.close()
+
+    return path
+
+
+def test_round_trip(log):
+    records = list(TraceReader(str(log)).records())
+
+    assert [record["kind"] for record in records] == ["call", "call", "return", "unwind"]
+    assert [record["call"] for record in records] == [1, 2, 2, 1]
+    assert [record["depth"] for record in records] == [1, 2, 2, 1]
+    assert records[0]["time"] == pytest.approx(1.5)
+    assert records[1]["strings"] == ["fib", "2"]
+    assert records[3]["strings"] == ["fib"]
+
+
+def test_text(log):
+    lines = [TraceReader.text(record) for record in TraceReader(str(log)).records()]
+
+    assert lines[0].endswith(" 1 -> (fib 3)")
+    assert lines[1].endswith(" | 2 -> (fib 2)")
+    assert lines[2].endswith(" | 2 <- fib: 1")
+    assert lines[3].endswith(" 1 <- fib: (non-local exit)")
+
+
+def test_unicode_and_deep_stacks(tmp_path):
+    path = tmp_path / "trace.log"
+
+    writer = TraceWriter(str(path))
+    writer.write(TraceLog.CALL, 0, 1, 100_000, ["insert", '"é中😀"', ""])
+    writer.close()
+
+    record, = TraceReader(str(path)).records()
+
+    assert record["strings"] == ["insert", '"é中😀"', ""]
+    # depths past a u16 are clamped
+    assert record["depth"] == 0xffff
+
+
+def test_truncated_tail(log):
+    # a log still being written can end partway through a record
+    data = log.read_bytes()
+    log.write_bytes(data[:-3])
+
+    assert len(list(TraceReader(str(log)).records())) == 3
+
+
+def test_not_a_log(tmp_path):
+    path = tmp_path / "other"
+    path.write_bytes(b"something else\n")
+
+    with pytest.raises(ValueError):
+        list(TraceReader(str(path)).records())